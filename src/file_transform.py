@@ -1,4 +1,11 @@
 import json
+
+import ijson
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时退回标准库 json
+    orjson = None
 """
 Ragas测试集生成的文件结构不符合评估接口的入参要求，需要做格式转换
 """
@@ -6,41 +13,57 @@ def convert_ragas_format(source_file, target_file):
     """
     将Ragas测试集格式转换为评估所需的输入格式
     """
-    # 读取源文件
-    with open(source_file, 'r', encoding='utf-8') as f:
-        ragas_data = json.load(f)
-
-    # 构建目标格式
-    eval_format = {
-        "testset": []
-    }
-
-    for item in ragas_data:
-        eval_sample = item["eval_sample"]
-
-        # 构建测试集项
-        test_item = {
-            "question": eval_sample["user_input"],
-            "ground_truth": eval_sample["reference"],
-            "ground_truth_contexts": eval_sample["reference_contexts"] if eval_sample["reference_contexts"] else [],
-            "metadata": {
-                "synthesizer_name": item["synthesizer_name"],
-                "difficulty": _determine_difficulty(item["synthesizer_name"]),
-                "type": _determine_question_type(item["synthesizer_name"]),
-                "category": "金融/银行业务"
-            }
+    # 流式读取源文件，逐条转换，避免一次性加载整个测试集
+    with open(source_file, 'rb') as f:
+        eval_format = {
+            "testset": [_make_item(item) for item in ijson.items(f, 'item', use_float=True)]
         }
 
-        eval_format["testset"].append(test_item)
-
     # 写入目标文件
-    with open(target_file, 'w', encoding='utf-8') as f:
-        json.dump(eval_format, f, ensure_ascii=False, indent=2)
+    with open(target_file, 'wb') as f:
+        if orjson is not None:
+            f.write(orjson.dumps(eval_format, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            # 分块编码写入，避免先在内存中拼出完整的 JSON 字符串
+            for chunk in json.JSONEncoder(ensure_ascii=False, indent=2).iterencode(eval_format):
+                f.write(chunk.encode('utf-8'))
 
     print(f"转换完成！结果已保存到 {target_file}")
     return eval_format
 
 
+def _make_item(item):
+    """将单条Ragas样本转换为测试集项"""
+    eval_sample = item["eval_sample"]
+    synthesizer_name = item["synthesizer_name"]
+    difficulty, question_type = _classify(synthesizer_name)
+
+    return {
+        "question": eval_sample["user_input"],
+        "ground_truth": eval_sample["reference"],
+        "ground_truth_contexts": eval_sample["reference_contexts"] if eval_sample["reference_contexts"] else [],
+        "metadata": {
+            "synthesizer_name": synthesizer_name,
+            "difficulty": difficulty,
+            "type": question_type,
+            "category": "金融/银行业务"
+        }
+    }
+
+
+# synthesizer_name -> (difficulty, type)，测试集中不同的 synthesizer_name 只有少数几种
+_CLASSIFY = {}
+
+
+def _classify(synthesizer_name):
+    """根据synthesizer_name确定 (问题难度, 问题类型)，结果按名称缓存"""
+    result = _CLASSIFY.get(synthesizer_name)
+    if result is None:
+        result = (_determine_difficulty(synthesizer_name), _determine_question_type(synthesizer_name))
+        _CLASSIFY[synthesizer_name] = result
+    return result
+
+
 def _determine_difficulty(synthesizer_name):
     """根据synthesizer_name确定问题难度"""
     if "single_hop" in synthesizer_name:
@@ -69,6 +92,13 @@ if __name__ == "__main__":
     # 执行转换
     converted_data = convert_ragas_format(source_file, target_file)
 
-    # 打印转换后的数据预览
+    # 打印转换后的数据预览（只展示前几条，避免大测试集时重复序列化全部数据）
+    preview = {
+        "testset": converted_data["testset"][:3],
+        "_total": len(converted_data["testset"])
+    }
     print("\n转换后的数据预览：")
-    print(json.dumps(converted_data, ensure_ascii=False, indent=2))
\ No newline at end of file
+    if orjson is not None:
+        print(orjson.dumps(preview, option=orjson.OPT_INDENT_2).decode('utf-8'))
+    else:
+        print(json.dumps(preview, ensure_ascii=False, indent=2))
\ No newline at end of file
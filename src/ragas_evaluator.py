@@ -5,23 +5,49 @@ Ragas 评估器
 
 import os
 import logging
-from typing import List, Dict, Any
-from datasets import Dataset
-from ragas import evaluate
-from ragas.metrics import (
-    context_precision,
-    context_recall,
-    faithfulness,
-    answer_relevancy,
-    answer_correctness,
-    answer_similarity,
-)
-from langchain_community.llms import Tongyi
-from langchain_community.embeddings import DashScopeEmbeddings
+import pickle
+from hashlib import blake2b
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 import pandas as pd
 
+# ragas / langchain / datasets 导入开销较大，延迟到实际评估时再导入，
+# 只需要 calculate_summary_stats 等统计功能的调用方无需加载它们
+if TYPE_CHECKING:
+    from datasets import Dataset
+
 logger = logging.getLogger(__name__)
 
+# Ragas 评估输入列
+_INPUT_COLUMNS = ['question', 'answer', 'contexts', 'ground_truth']
+
+# Ragas 评估结果中对应输入列的列名（EvaluationDataset 的字段名），
+# 缓存路径直接拼接输入数据时按此重命名，与 Ragas 输出保持一致
+_RESULT_INPUT_COLUMNS = {
+    'question': 'user_input',
+    'answer': 'response',
+    'contexts': 'retrieved_contexts',
+    'ground_truth': 'reference',
+}
+
+# Ragas 指标列（保持输出顺序）
+_METRIC_COLUMNS = (
+    'context_precision',
+    'context_recall',
+    'faithfulness',
+    'answer_relevancy',
+    'answer_correctness',
+    'answer_similarity',
+)
+
+# 检索方式对比时额外统计的列
+_COMPARISON_COLUMNS = _METRIC_COLUMNS + ('response_time',)
+
+
+def _available_columns(df: pd.DataFrame, columns) -> List[str]:
+    """按 columns 的顺序返回 df 中存在的列"""
+    present = set(df.columns)
+    return [col for col in columns if col in present]
+
 
 class RagasEvaluator:
     """Ragas 评估器"""
@@ -30,7 +56,10 @@ class RagasEvaluator:
         self, 
         llm_model: str = "qwen-turbo",
         embedding_model: str = "text-embedding-v3",
-        api_key: str = None
+        api_key: str = None,
+        max_workers: int = 16,
+        timeout: int = 180,
+        cache_dir: Optional[str] = None
     ):
         """
         初始化评估器
@@ -39,24 +68,58 @@ class RagasEvaluator:
             llm_model: LLM 模型名称
             embedding_model: Embedding 模型名称
             api_key: API 密钥
+            max_workers: 评估时并发调用 LLM/Embedding 的最大数量（遇到 429 限流时调小）
+            timeout: 单次 LLM/Embedding 调用超时时间（秒）
+            cache_dir: 评估结果磁盘缓存目录（需要 diskcache），为空时不缓存
         """
+        from ragas.metrics import (
+            context_precision,
+            context_recall,
+            faithfulness,
+            answer_relevancy,
+            answer_correctness,
+            answer_similarity,
+        )
+        from ragas.run_config import RunConfig
+        from langchain_community.llms import Tongyi
+        from langchain_community.embeddings import DashScopeEmbeddings
+        
         if api_key:
             os.environ["DASHSCOPE_API_KEY"] = api_key
         
+        self.llm_model = llm_model
+        self.embedding_model = embedding_model
         self.llm = Tongyi(model=llm_model)
         self.embeddings = DashScopeEmbeddings(model=embedding_model)
+        self.run_config = RunConfig(max_workers=max_workers, timeout=timeout)
+        
+        # 按 (模型, 指标, 输入) 缓存单项得分，相同输入重复评估时不再调用 LLM
+        self.cache = None
+        if cache_dir:
+            try:
+                import diskcache
+            except ImportError:
+                logger.warning("未安装 diskcache，评估结果缓存不可用: pip install diskcache")
+            else:
+                self.cache = diskcache.Cache(cache_dir)
+                logger.info(f"评估结果缓存目录: {cache_dir}")
         
         # 定义评估指标
-        self.metrics = [
+        # 只依赖 (question, contexts, ground_truth) 的检索质量指标
+        self.context_metrics = [
             context_precision,
             context_recall,
+        ]
+        # 依赖模型答案的生成质量指标
+        self.answer_metrics = [
             faithfulness,
             answer_relevancy,
             answer_correctness,
             answer_similarity,
         ]
+        self.metrics = self.context_metrics + self.answer_metrics
         
-        logger.info(f"初始化 Ragas 评估器: LLM={llm_model}, Embedding={embedding_model}")
+        logger.info(f"初始化 Ragas 评估器: LLM={llm_model}, Embedding={embedding_model}, 并发数={max_workers}")
     
     def evaluate_batch(
         self, 
@@ -77,6 +140,8 @@ class RagasEvaluator:
         Returns:
             DataFrame: 评估结果
         """
+        from datasets import Dataset
+        
         logger.info(f"开始批量评估 {len(questions)} 个问题...")
         
         # 准备数据集
@@ -87,13 +152,82 @@ class RagasEvaluator:
             'ground_truth': ground_truths
         })
         
+        return self._evaluate_dataset(dataset)
+    
+    def _evaluate_dataset(self, dataset: "Dataset", metrics: List = None) -> pd.DataFrame:
+        """
+        对已构建好的数据集执行评估
+        
+        启用缓存时先按行、按指标查找已缓存的得分，只对存在未缓存得分的行调用 Ragas
+        
+        Args:
+            dataset: 包含 question/answer/contexts/ground_truth 列的 Dataset
+            metrics: 评估指标，默认使用全部指标
+            
+        Returns:
+            DataFrame: 评估结果
+        """
+        metrics = metrics or self.metrics
+        if self.cache is None:
+            return self._run_evaluate(dataset, metrics)
+        
+        df_in = dataset.to_pandas()
+        metric_names = [metric.name for metric in metrics]
+        keys = [
+            [self._cache_key(name, row) for name in metric_names]
+            for row in df_in.itertuples(index=False)
+        ]
+        scores = pd.DataFrame(
+            [[self.cache.get(key, default=float('nan')) for key in key_row] for key_row in keys],
+            columns=metric_names,
+            dtype=float
+        )
+        
+        pending = scores.isna().any(axis=1).to_numpy()
+        if pending.any():
+            pending_rows = pending.nonzero()[0]
+            logger.info(f"评估缓存命中 {len(df_in) - len(pending_rows)} 行，需评估 {len(pending_rows)} 行")
+            df_new = self._run_evaluate(dataset.select(pending_rows), metrics)
+            new_scores = df_new[metric_names].to_numpy(dtype=float)
+            scores.loc[pending, metric_names] = new_scores
+            
+            # 只缓存成功的得分，失败（NaN）的下次重新评估
+            for row, score_row in zip(pending_rows, new_scores):
+                for key, score in zip(keys[row], score_row):
+                    if not pd.isna(score):
+                        self.cache.set(key, float(score))
+        else:
+            logger.info(f"评估缓存全部命中: {len(df_in)} 行")
+        
+        # 输入列改用 Ragas 结果中的列名，与未启用缓存时的输出一致
+        df_in = df_in.rename(columns=_RESULT_INPUT_COLUMNS)
+        return pd.concat([df_in, scores], axis=1)
+    
+    def _cache_key(self, metric_name: str, row) -> str:
+        """评估缓存键：模型、指标和评估输入的哈希"""
+        payload = (
+            self.llm_model,
+            self.embedding_model,
+            metric_name,
+            row.question,
+            row.answer,
+            tuple(row.contexts),
+            row.ground_truth,
+        )
+        return blake2b(pickle.dumps(payload), digest_size=16).hexdigest()
+    
+    def _run_evaluate(self, dataset: "Dataset", metrics: List) -> pd.DataFrame:
+        """调用 Ragas 评估数据集"""
+        from ragas import evaluate
+        
         try:
             # 执行评估
             result = evaluate(
                 dataset,
-                metrics=self.metrics,
+                metrics=metrics,
                 llm=self.llm,
                 embeddings=self.embeddings,
+                run_config=self.run_config,
                 raise_exceptions=False
             )
 
@@ -107,6 +241,56 @@ class RagasEvaluator:
             logger.error(f"批量评估失败: {e}")
             raise
     
+    def _evaluate_deduplicated(self, df_eval: pd.DataFrame) -> pd.DataFrame:
+        """
+        评估输入数据，对重复的 (question, contexts, ground_truth) 只评估一次检索质量指标
+        
+        多种检索配置复用同一批问题时，context_precision/context_recall 的输入完全相同，
+        只需对去重后的组合评估一次再广播回所有行；依赖答案的指标仍逐行评估。
+        
+        Args:
+            df_eval: 包含 question/answer/contexts/ground_truth 列的 DataFrame
+            
+        Returns:
+            DataFrame: 评估结果，行顺序与 df_eval 一致
+        """
+        from datasets import Dataset
+        
+        df_eval = df_eval.reset_index(drop=True)
+        
+        # contexts 是列表，转成 tuple 后才能哈希
+        keys = pd.Series(list(zip(
+            df_eval['question'],
+            df_eval['contexts'].map(tuple),
+            df_eval['ground_truth']
+        )))
+        codes, uniques = pd.factorize(keys)
+        
+        # 没有重复时一次评估全部指标
+        if len(uniques) == len(df_eval):
+            return self._evaluate_dataset(Dataset.from_pandas(df_eval, preserve_index=False))
+        
+        logger.info(f"检索质量指标去重: {len(df_eval)} 行 -> {len(uniques)} 组")
+        
+        df_answer = self._evaluate_dataset(
+            Dataset.from_pandas(df_eval, preserve_index=False),
+            self.answer_metrics
+        ).reset_index(drop=True)
+        
+        # factorize 按首次出现顺序编号，首次出现的行依次对应编号 0..k-1
+        df_unique = df_eval[(~keys.duplicated()).to_numpy()]
+        df_context = self._evaluate_dataset(
+            Dataset.from_pandas(df_unique, preserve_index=False),
+            self.context_metrics
+        )
+        context_cols = _available_columns(df_context, _METRIC_COLUMNS)
+        df_context = df_context[context_cols].iloc[codes].reset_index(drop=True)
+        
+        # 按 输入列 + 指标顺序 合并
+        df_result = pd.concat([df_answer, df_context], axis=1)
+        input_cols = [col for col in df_result.columns if col not in _METRIC_COLUMNS]
+        return df_result.reindex(columns=input_cols + _available_columns(df_result, _METRIC_COLUMNS))
+    
     def evaluate_single(
         self,
         question: str,
@@ -126,6 +310,9 @@ class RagasEvaluator:
         Returns:
             Dict: 评估指标
         """
+        from datasets import Dataset
+        from ragas import evaluate
+        
         logger.info(f"评估单个问题: {question[:50]}...")
         
         # 准备单个数据集
@@ -143,6 +330,7 @@ class RagasEvaluator:
                 metrics=self.metrics,
                 llm=self.llm,
                 embeddings=self.embeddings,
+                run_config=self.run_config,
                 raise_exceptions=False
             )
             
@@ -180,23 +368,23 @@ class RagasEvaluator:
         """
         logger.info(f"开始评估 {len(test_data)} 条测试数据...")
         
-        # 提取评估所需数据
-        questions = [d['question'] for d in test_data]
-        answers = [d['answer'] for d in test_data]
-        contexts = [d['contexts'] for d in test_data]
-        ground_truths = [d['ground_truth'] for d in test_data]
+        # 一次性构建输入 DataFrame，直接由其生成评估数据集
+        df_in = pd.DataFrame(test_data)
         
-        # 执行评估
-        df_metrics = self.evaluate_batch(questions, answers, contexts, ground_truths)
+        # 执行评估（重复的检索结果只评估一次检索质量指标）
+        df_metrics = self._evaluate_deduplicated(df_in[_INPUT_COLUMNS])
         
-        # 添加 question 列（如果不存在）
-        if 'question' not in df_metrics.columns:
-            df_metrics['question'] = questions
-        
-        # 添加其他元数据
-        for key in test_data[0].keys():
-            if key not in ['question', 'answer', 'contexts', 'ground_truth']:
-                df_metrics[key] = [d.get(key) for d in test_data]
+        # 添加 question 列（如果不存在）和其他元数据
+        # 一次性拼接所有列，避免逐列插入导致 DataFrame 碎片化
+        meta_cols = [
+            col for col in df_in.columns
+            if col not in ['answer', 'contexts', 'ground_truth']
+            and not (col == 'question' and 'question' in df_metrics.columns)
+        ]
+        df_metrics = pd.concat(
+            [df_metrics.reset_index(drop=True), df_in[meta_cols].reset_index(drop=True)],
+            axis=1
+        )
         
         # 重新排列列顺序，把重要列放在前面
         # 优先顺序：question > 元数据 > 指标
@@ -209,8 +397,7 @@ class RagasEvaluator:
         other_cols = [col for col in df_metrics.columns if col not in existing_priority_cols]
         
         # 合并列顺序
-        ordered_cols = existing_priority_cols + other_cols
-        df_metrics = df_metrics[ordered_cols]
+        df_metrics = df_metrics.reindex(columns=existing_priority_cols + other_cols)
         
         logger.info("评估完成")
         return df_metrics
@@ -225,33 +412,21 @@ class RagasEvaluator:
         Returns:
             Dict: 汇总统计
         """
-        metric_columns = [
-            'context_precision',
-            'context_recall',
-            'faithfulness',
-            'answer_relevancy',
-            'answer_correctness',
-            'answer_similarity'
-        ]
-        
         # 过滤出存在的指标列
-        available_metrics = [col for col in metric_columns if col in df_results.columns]
+        available_metrics = _available_columns(df_results, _METRIC_COLUMNS)
         
         summary = {}
-        for metric in available_metrics:
-            summary[metric] = {
-                'mean': df_results[metric].mean(),
-                'std': df_results[metric].std(),
-                'min': df_results[metric].min(),
-                'max': df_results[metric].max(),
-                'median': df_results[metric].median()
-            }
-        
-        # 计算整体得分（所有指标的平均值）
         if available_metrics:
+            # 一次 agg 计算所有指标的统计量
+            stats = df_results[available_metrics].agg(['mean', 'std', 'min', 'max', 'median'])
+            for metric in available_metrics:
+                summary[metric] = stats[metric].to_dict()
+            
+            # 计算整体得分（所有指标的平均值），复用已计算的均值
+            means = stats.loc['mean']
             summary['overall_score'] = {
-                'mean': df_results[available_metrics].mean().mean(),
-                'std': df_results[available_metrics].mean().std()
+                'mean': means.mean(),
+                'std': means.std()
             }
         
         return summary
@@ -270,21 +445,12 @@ class RagasEvaluator:
             logger.warning("结果中没有 search_type 列，无法进行对比")
             return pd.DataFrame()
         
-        metric_columns = [
-            'context_precision',
-            'context_recall',
-            'faithfulness',
-            'answer_relevancy',
-            'answer_correctness',
-            'answer_similarity',
-            'response_time'
-        ]
-        
         # 过滤出存在的指标列
-        available_metrics = [col for col in metric_columns if col in df_results.columns]
+        available_metrics = _available_columns(df_results, _COMPARISON_COLUMNS)
         
-        # 按检索类型分组统计
-        comparison = df_results.groupby('search_type')[available_metrics].agg(['mean', 'std'])
+        # 按检索类型分组统计（分类键 + 不排序，减少分组开销；不修改调用方的 DataFrame）
+        search_type = df_results['search_type'].astype('category')
+        comparison = df_results.groupby(search_type, sort=False, observed=True)[available_metrics].agg(['mean', 'std'])
         
         return comparison
 
@@ -1,23 +1,8 @@
 import os
-from datasets import Dataset
-from ragas import evaluate
 
 # 设置阿里云API密钥（从环境变量获取）
 os.environ["DASHSCOPE_API_KEY"] = ""  # 替换为你的密钥
 
-# 主要评估指标分类
-from ragas.metrics import (
-    # 检索质量指标
-    context_precision,  # 上下文精确度
-    context_recall,  # 上下文召回率
-    # 生成质量指标
-    faithfulness,  # 答案忠实度
-    answer_relevancy,  # 答案相关性
-    answer_correctness,  # 答案正确性
-    answer_similarity  # 答案相似度
-
-)
-
 def explain_metrics():
     """解释每个指标的含义"""
     metrics_explanation = {
@@ -46,6 +31,23 @@ def simple_ragas_evaluation(test_data, sample_size=5):
     """
     最简单的RAG评估MVP
     """
+    # ragas / datasets / langchain 导入较慢，只在真正执行评估时导入
+    from datasets import Dataset
+    from ragas import evaluate
+    # 主要评估指标分类
+    from ragas.metrics import (
+        # 检索质量指标
+        context_precision,  # 上下文精确度
+        context_recall,  # 上下文召回率
+        # 生成质量指标
+        faithfulness,  # 答案忠实度
+        answer_relevancy,  # 答案相关性
+        answer_correctness,  # 答案正确性
+        answer_similarity  # 答案相似度
+    )
+    from langchain_community.llms import Tongyi
+    from langchain_community.embeddings import DashScopeEmbeddings
+
     try:
         # 1. 读取数据
         print("📊 读取数据...")
@@ -58,41 +60,19 @@ def simple_ragas_evaluation(test_data, sample_size=5):
         dataset = Dataset.from_dict(test_data)
         print(dataset)
 
-        # 3. 导入模型（会自动使用阿里云）
-        from langchain_community.llms import Tongyi
-        from langchain_community.embeddings import DashScopeEmbeddings
-
+        # 3. 创建模型（会自动使用阿里云）
         llm = Tongyi(model="qwen-turbo")
         embeddings = DashScopeEmbeddings(model="text-embedding-v3")
-        # 存储每条问题结果
-        all_results = []
 
-        # 4. 执行评估
+        # 4. 执行评估（整个数据集一次性评估，Ragas 内部并发调用 LLM）
         print("🚀 开始评估...")
-        for idx, sample in enumerate(dataset):
-            contexts_combined = " ".join(sample['contexts'])
-
-            single_dataset = Dataset.from_dict({
-                'question': [sample['question']],
-                'contexts': [sample['contexts']],
-                'answer': [sample['answer']],
-                'ground_truth': [sample['ground_truth']]
-            })
-
-            result = evaluate(
-                single_dataset,
-                metrics=[context_precision, context_recall, faithfulness, answer_relevancy,
-                         answer_correctness, answer_similarity],
-                embeddings=embeddings,
-                llm=llm
-            )
-
-            # answer_relevancy,  # 答案相关性
-            # answer_correctness,  # 答案正确性
-            # answer_similarity  # 答案相似度
-            row = result.to_pandas().iloc[0].to_dict()
-            row['question'] = sample['question']
-            all_results.append(row)
+        result = evaluate(
+            dataset,
+            metrics=[context_precision, context_recall, faithfulness, answer_relevancy,
+                     answer_correctness, answer_similarity],
+            embeddings=embeddings,
+            llm=llm
+        )
 
         # 5. 输出结果
         print("\n✅ 评估完成！")
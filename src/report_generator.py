@@ -3,317 +3,73 @@
 生成可视化报告和HTML报告
 """
 
+import html
 import json
 import logging
+import os
+import shutil
+import string
+import struct
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional, TextIO, Tuple
+import ijson
+import numpy as np
 import pandas as pd
 
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时退回标准库 json
+    orjson = None
+
+try:
+    from pyarrow import csv as pacsv
+except ImportError:  # 未安装 pyarrow 时使用 pandas 解析 CSV
+    pacsv = None
+
 logger = logging.getLogger(__name__)
 
+# RAGAS 评估指标
+_METRICS: Tuple[str, ...] = (
+    'context_precision', 'context_recall', 'faithfulness',
+    'answer_relevancy', 'answer_correctness', 'answer_similarity',
+)
 
-class ReportGenerator:
-    """报告生成器"""
-    
-    def __init__(self, results_dir: str):
-        """
-        初始化报告生成器
-        
-        Args:
-            results_dir: 结果目录
-        """
-        self.results_dir = Path(results_dir)
-        
-        # 加载评估结果
-        self.df_results = None
-        self.comparison = None
-        self.report = None
-        
-        self._load_results()
-    
-    def _load_results(self):
-        """加载结果文件"""
-        try:
-            # 加载评估结果
-            csv_file = self.results_dir / "evaluation_results.csv"
-            if csv_file.exists():
-                self.df_results = pd.read_csv(csv_file)
-                logger.info(f"加载评估结果: {len(self.df_results)} 条")
-            
-            # 加载对比结果
-            comparison_file = self.results_dir / "search_type_comparison.csv"
-            if comparison_file.exists():
-                self.comparison = pd.read_csv(comparison_file, header=[0, 1], index_col=0)
-                logger.info(f"加载对比结果: {len(self.comparison)} 种配置")
-            
-            # 加载测试报告
-            report_file = self.results_dir / "test_report.json"
-            if report_file.exists():
-                with open(report_file, 'r', encoding='utf-8') as f:
-                    self.report = json.load(f)
-                logger.info("加载测试报告")
-        
-        except Exception as e:
-            logger.error(f"加载结果文件失败: {e}")
-    
-    def generate_visualizations(self) -> List[str]:
-        """
-        生成可视化图表
-        
-        Returns:
-            List[str]: 生成的图表文件路径列表
-        """
-        try:
-            import matplotlib.pyplot as plt
-            import matplotlib
-            matplotlib.use('Agg')  # 非交互式后端
-            import seaborn as sns
-            sns.set_style("whitegrid")
-            plt.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans']  # 支持中文
-            plt.rcParams['axes.unicode_minus'] = False
-        except ImportError:
-            logger.error("需要安装 matplotlib 和 seaborn: pip install matplotlib seaborn")
-            return []
-        
-        generated_files = []
-        
-        if self.df_results is None or len(self.df_results) == 0:
-            logger.warning("没有评估结果可供可视化")
-            return generated_files
-        
-        try:
-            # 1. 指标对比雷达图
-            radar_file = self._generate_radar_chart(plt, sns)
-            if radar_file:
-                generated_files.append(radar_file)
-            
-            # 2. 指标箱线图
-            box_file = self._generate_box_plot(plt, sns)
-            if box_file:
-                generated_files.append(box_file)
-            
-            # 3. 响应时间对比
-            time_file = self._generate_response_time_chart(plt, sns)
-            if time_file:
-                generated_files.append(box_file)
-            
-            # 4. 指标热力图
-            heatmap_file = self._generate_heatmap(plt, sns)
-            if heatmap_file:
-                generated_files.append(heatmap_file)
-            
-            logger.info(f"生成了 {len(generated_files)} 个可视化图表")
-            
-        except Exception as e:
-            logger.error(f"生成可视化图表失败: {e}")
-        
-        return generated_files
-    
-    def _generate_radar_chart(self, plt, sns) -> str:
-        """生成雷达图"""
-        if 'search_type' not in self.df_results.columns:
-            return None
-        
-        try:
-            import numpy as np
-            
-            metrics = ['context_precision', 'context_recall', 'faithfulness', 
-                      'answer_relevancy', 'answer_correctness', 'answer_similarity']
-            available_metrics = [m for m in metrics if m in self.df_results.columns]
-            
-            if len(available_metrics) < 3:
-                return None
-            
-            # 计算每种检索类型的平均值
-            grouped = self.df_results.groupby('search_type')[available_metrics].mean()
-            
-            # 雷达图
-            angles = np.linspace(0, 2 * np.pi, len(available_metrics), endpoint=False).tolist()
-            angles += angles[:1]
-            
-            fig, ax = plt.subplots(figsize=(10, 8), subplot_kw=dict(projection='polar'))
-            
-            for search_type in grouped.index:
-                values = grouped.loc[search_type].tolist()
-                values += values[:1]
-                ax.plot(angles, values, 'o-', linewidth=2, label=search_type)
-                ax.fill(angles, values, alpha=0.15)
-            
-            ax.set_xticks(angles[:-1])
-            ax.set_xticklabels(available_metrics)
-            ax.set_ylim(0, 1)
-            ax.set_title('检索方式指标对比 (雷达图)', size=16, pad=20)
-            ax.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1))
-            ax.grid(True)
-            
-            file_path = self.results_dir / "radar_chart.png"
-            plt.tight_layout()
-            plt.savefig(file_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            logger.info(f"雷达图已保存: {file_path}")
-            return str(file_path)
-            
-        except Exception as e:
-            logger.error(f"生成雷达图失败: {e}")
-            return None
-    
-    def _generate_box_plot(self, plt, sns) -> str:
-        """生成箱线图"""
-        if 'search_type' not in self.df_results.columns:
-            return None
-        
-        try:
-            metrics = ['context_precision', 'context_recall', 'faithfulness', 
-                      'answer_relevancy', 'answer_correctness', 'answer_similarity']
-            available_metrics = [m for m in metrics if m in self.df_results.columns]
-            
-            if len(available_metrics) < 2:
-                return None
-            
-            # 准备数据
-            df_melted = self.df_results.melt(
-                id_vars=['search_type'],
-                value_vars=available_metrics,
-                var_name='metric',
-                value_name='score'
-            )
-            
-            # 移除None值
-            df_melted = df_melted.dropna(subset=['score'])
-            
-            if len(df_melted) == 0:
-                logger.warning("箱线图：所有数据为空，跳过生成")
-                return None
-            
-            # 绘制箱线图
-            fig, ax = plt.subplots(figsize=(14, 8))
-            sns.boxplot(data=df_melted, x='metric', y='score', hue='search_type', ax=ax)
-            
-            ax.set_title('各指标得分分布 (箱线图)', size=16)
-            ax.set_xlabel('指标', size=12)
-            ax.set_ylabel('得分', size=12)
-            ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
-            ax.legend(title='检索方式', bbox_to_anchor=(1.05, 1), loc='upper left')
-            ax.grid(True, alpha=0.3)
-            
-            file_path = self.results_dir / "box_plot.png"
-            plt.tight_layout()
-            plt.savefig(file_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            logger.info(f"箱线图已保存: {file_path}")
-            return str(file_path)
-            
-        except Exception as e:
-            logger.error(f"生成箱线图失败: {e}")
-            return None
-    
-    def _generate_response_time_chart(self, plt, sns) -> str:
-        """生成响应时间对比图"""
-        if 'response_time' not in self.df_results.columns or 'search_type' not in self.df_results.columns:
-            return None
-        
-        try:
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            grouped = self.df_results.groupby('search_type')['response_time'].agg(['mean', 'std'])
-            grouped.plot(kind='bar', y='mean', yerr='std', ax=ax, legend=False)
-            
-            ax.set_title('平均响应时间对比', size=16)
-            ax.set_xlabel('检索方式', size=12)
-            ax.set_ylabel('响应时间 (秒)', size=12)
-            ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
-            ax.grid(True, alpha=0.3, axis='y')
-            
-            file_path = self.results_dir / "response_time.png"
-            plt.tight_layout()
-            plt.savefig(file_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            logger.info(f"响应时间图已保存: {file_path}")
-            return str(file_path)
-            
-        except Exception as e:
-            logger.error(f"生成响应时间图失败: {e}")
-            return None
-    
-    def _generate_heatmap(self, plt, sns) -> str:
-        """生成热力图"""
-        if self.comparison is None or len(self.comparison) == 0:
-            return None
-        
-        try:
-            # 提取 mean 值
-            mean_data = self.comparison.xs('mean', level=1, axis=1)
-            
-            fig, ax = plt.subplots(figsize=(12, 6))
-            sns.heatmap(mean_data.T, annot=True, fmt='.3f', cmap='YlOrRd', ax=ax,
-                       cbar_kws={'label': '平均得分'})
-            
-            ax.set_title('检索方式 × 指标热力图', size=16)
-            ax.set_xlabel('检索方式', size=12)
-            ax.set_ylabel('指标', size=12)
-            
-            file_path = self.results_dir / "heatmap.png"
-            plt.tight_layout()
-            plt.savefig(file_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            logger.info(f"热力图已保存: {file_path}")
-            return str(file_path)
-            
-        except Exception as e:
-            logger.error(f"生成热力图失败: {e}")
-            return None
-    
-    def _load_evaluation_results(self) -> List[Dict[str, Any]]:
-        """加载详细评估结果"""
-        try:
-            json_file = self.results_dir / "evaluation_results.json"
-            if json_file.exists():
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    results = json.load(f)
-                    logger.info(f"加载了 {len(results)} 条详细评估结果")
-                    return results
-        except Exception as e:
-            logger.error(f"加载评估结果失败: {e}")
-        return []
-    
-    def generate_html_report(self) -> str:
-        """
-        生成 HTML 报告
-        
-        Returns:
-            str: HTML 文件路径
-        """
-        if self.df_results is None or self.report is None:
-            logger.warning("缺少必要数据，无法生成 HTML 报告")
-            return None
-        
-        try:
-            html_content = self._build_html_content()
-            
-            file_path = self.results_dir / "report.html"
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            
-            logger.info(f"HTML 报告已保存: {file_path}")
-            return str(file_path)
-            
-        except Exception as e:
-            logger.error(f"生成 HTML 报告失败: {e}")
-            return None
-    
-    def _build_html_content(self) -> str:
-        """构建 HTML 内容"""
-        summary = self.report.get('test_summary', {})
-        stats = self.report.get('summary_statistics', {})
-        
-        # 加载详细评估结果
-        evaluation_results = self._load_evaluation_results()
-        
-        html = f"""
+# 图表只用到这些列，读取评估结果时只加载它们
+_CHART_COLUMNS = ('search_type', 'response_time') + _METRICS
+
+# 报告中展示的图表文件及标题
+_REPORT_CHARTS = {
+    'radar_chart.png': '指标对比雷达图',
+    'box_plot.png': '指标分布箱线图',
+    'heatmap.png': '检索方式对比热力图',
+    'response_time.png': '响应时间对比',
+}
+
+# HTML 表格首屏行数，与页面默认的每页条数一致；其余行由页面脚本按页渲染
+_INITIAL_PAGE_SIZE = 20
+
+# 写出报告文件时使用的缓冲区大小
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# 图表输出分辨率；HTML 中会被浏览器缩放显示，无需 300dpi
+# 版面由 Figure 的 constrained 布局引擎计算（图例放在绘图区外侧），
+# 保存时不再使用 bbox_inches='tight' 二次渲染
+_CHART_DPI = 120
+
+# PNG 使用最低 zlib 压缩级别：文件稍大，但编码耗时大幅减少
+_PNG_SAVE_KWARGS = {'compress_level': 1, 'optimize': False}
+
+# 各图表共用的配色（tab10 即 matplotlib 默认颜色循环）与 x 轴刻度标签旋转参数
+_PALETTE_NAME = 'tab10'
+_PALETTE_SIZE = 8
+_TICK_ROT = {'rotation': 45, 'ha': 'right'}
+
+
+# HTML 报告模板：页面头部（含样式）、正文、表格之后的分页/弹窗/脚本和页脚
+# 脚本部分含 JS 模板字符串的 ${...}，不能放入 string.Template，按原样写出
+_HTML_HEAD = """
 <!DOCTYPE html>
 <html lang="zh-CN">
 <head>
@@ -321,88 +77,91 @@ class ReportGenerator:
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>RAG 测试报告</title>
     <style>
-        body {{ font-family: Arial, sans-serif; margin: 20px; background-color: #f5f5f5; }}
-        .container {{ max-width: 1400px; margin: 0 auto; background-color: white; padding: 30px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
-        h1 {{ color: #333; border-bottom: 3px solid #4CAF50; padding-bottom: 10px; }}
-        h2 {{ color: #555; margin-top: 30px; border-left: 4px solid #4CAF50; padding-left: 10px; }}
-        .summary {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin: 20px 0; }}
-        .summary-card {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 8px; }}
-        .summary-card h3 {{ margin: 0; font-size: 14px; opacity: 0.9; }}
-        .summary-card p {{ margin: 10px 0 0 0; font-size: 32px; font-weight: bold; }}
-        table {{ width: 100%; border-collapse: collapse; margin: 20px 0; font-size: 14px; }}
-        th, td {{ padding: 10px 8px; text-align: left; border-bottom: 1px solid #ddd; }}
-        th {{ background-color: #4CAF50; color: white; position: sticky; top: 0; z-index: 10; }}
-        tr:hover {{ background-color: #f5f5f5; }}
-        .metric-good {{ color: #4CAF50; font-weight: bold; }}
-        .metric-medium {{ color: #FF9800; font-weight: bold; }}
-        .metric-poor {{ color: #f44336; font-weight: bold; }}
-        .metric-na {{ color: #999; font-style: italic; }}
-        .chart {{ margin: 20px 0; text-align: center; }}
-        .chart img {{ max-width: 100%; height: auto; border: 1px solid #ddd; border-radius: 4px; }}
-        .footer {{ margin-top: 40px; padding-top: 20px; border-top: 1px solid #ddd; text-align: center; color: #888; }}
+        body { font-family: Arial, sans-serif; margin: 20px; background-color: #f5f5f5; }
+        .container { max-width: 1400px; margin: 0 auto; background-color: white; padding: 30px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
+        h1 { color: #333; border-bottom: 3px solid #4CAF50; padding-bottom: 10px; }
+        h2 { color: #555; margin-top: 30px; border-left: 4px solid #4CAF50; padding-left: 10px; }
+        .summary { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin: 20px 0; }
+        .summary-card { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 8px; }
+        .summary-card h3 { margin: 0; font-size: 14px; opacity: 0.9; }
+        .summary-card p { margin: 10px 0 0 0; font-size: 32px; font-weight: bold; }
+        table { width: 100%; border-collapse: collapse; margin: 20px 0; font-size: 14px; }
+        th, td { padding: 10px 8px; text-align: left; border-bottom: 1px solid #ddd; }
+        th { background-color: #4CAF50; color: white; position: sticky; top: 0; z-index: 10; }
+        tr:hover { background-color: #f5f5f5; }
+        .metric-good { color: #4CAF50; font-weight: bold; }
+        .metric-medium { color: #FF9800; font-weight: bold; }
+        .metric-poor { color: #f44336; font-weight: bold; }
+        .metric-na { color: #999; font-style: italic; }
+        .chart { margin: 20px 0; text-align: center; }
+        .chart img { max-width: 100%; height: auto; border: 1px solid #ddd; border-radius: 4px; }
+        .footer { margin-top: 40px; padding-top: 20px; border-top: 1px solid #ddd; text-align: center; color: #888; }
         
         /* 详细数据表格样式 */
-        .data-controls {{ display: flex; justify-content: space-between; align-items: center; margin: 20px 0; flex-wrap: wrap; gap: 15px; }}
-        .search-box input {{ padding: 10px 15px; width: 300px; border: 2px solid #ddd; border-radius: 5px; font-size: 14px; }}
-        .search-box input:focus {{ outline: none; border-color: #4CAF50; }}
-        .filter-controls {{ display: flex; gap: 15px; align-items: center; }}
-        .filter-controls label {{ font-size: 14px; color: #555; }}
-        .filter-controls select {{ padding: 8px 12px; border: 2px solid #ddd; border-radius: 5px; font-size: 14px; cursor: pointer; }}
-        .table-container {{ overflow-x: auto; max-height: 600px; border: 1px solid #ddd; border-radius: 5px; }}
-        .text-cell {{ max-width: 200px; overflow: hidden; text-overflow: ellipsis; white-space: nowrap; cursor: help; }}
-        .detail-btn {{ background-color: #2196F3; color: white; border: none; padding: 6px 12px; border-radius: 4px; cursor: pointer; font-size: 12px; }}
-        .detail-btn:hover {{ background-color: #0b7dda; }}
+        .data-controls { display: flex; justify-content: space-between; align-items: center; margin: 20px 0; flex-wrap: wrap; gap: 15px; }
+        .search-box input { padding: 10px 15px; width: 300px; border: 2px solid #ddd; border-radius: 5px; font-size: 14px; }
+        .search-box input:focus { outline: none; border-color: #4CAF50; }
+        .filter-controls { display: flex; gap: 15px; align-items: center; }
+        .filter-controls label { font-size: 14px; color: #555; }
+        .filter-controls select { padding: 8px 12px; border: 2px solid #ddd; border-radius: 5px; font-size: 14px; cursor: pointer; }
+        .table-container { overflow-x: auto; max-height: 600px; border: 1px solid #ddd; border-radius: 5px; }
+        .text-cell { max-width: 200px; overflow: hidden; text-overflow: ellipsis; white-space: nowrap; cursor: help; }
+        .detail-btn { background-color: #2196F3; color: white; border: none; padding: 6px 12px; border-radius: 4px; cursor: pointer; font-size: 12px; }
+        .detail-btn:hover { background-color: #0b7dda; }
         
         /* 分页样式 */
-        .pagination {{ display: flex; justify-content: center; align-items: center; gap: 15px; margin: 20px 0; }}
-        .pagination button {{ padding: 10px 20px; background-color: #4CAF50; color: white; border: none; border-radius: 5px; cursor: pointer; font-size: 14px; }}
-        .pagination button:hover:not(:disabled) {{ background-color: #45a049; }}
-        .pagination button:disabled {{ background-color: #ccc; cursor: not-allowed; }}
-        .pagination span {{ font-size: 14px; color: #555; }}
+        .pagination { display: flex; justify-content: center; align-items: center; gap: 15px; margin: 20px 0; }
+        .pagination button { padding: 10px 20px; background-color: #4CAF50; color: white; border: none; border-radius: 5px; cursor: pointer; font-size: 14px; }
+        .pagination button:hover:not(:disabled) { background-color: #45a049; }
+        .pagination button:disabled { background-color: #ccc; cursor: not-allowed; }
+        .pagination span { font-size: 14px; color: #555; }
         
         /* 模态框样式 */
-        .modal {{ display: none; position: fixed; z-index: 1000; left: 0; top: 0; width: 100%; height: 100%; overflow: auto; background-color: rgba(0,0,0,0.5); }}
-        .modal-content {{ background-color: #fefefe; margin: 3% auto; padding: 20px 30px; border: 1px solid #888; border-radius: 8px; width: 80%; max-width: 900px; max-height: 85vh; overflow-y: auto; box-shadow: 0 4px 6px rgba(0,0,0,0.1); }}
-        .close {{ color: #aaa; float: right; font-size: 32px; font-weight: bold; cursor: pointer; line-height: 20px; }}
-        .close:hover, .close:focus {{ color: #000; }}
-        .detail-section {{ margin: 20px 0; padding: 15px; background-color: #f9f9f9; border-radius: 5px; border-left: 4px solid #4CAF50; }}
-        .detail-section h3 {{ margin-top: 0; color: #333; font-size: 16px; }}
-        .detail-section p {{ margin: 10px 0; color: #555; line-height: 1.6; white-space: pre-wrap; word-wrap: break-word; }}
-        .context-item {{ margin: 15px 0; padding: 0; background-color: white; border-radius: 6px; border: 1px solid #ddd; overflow: hidden; box-shadow: 0 2px 4px rgba(0,0,0,0.05); }}
-        .context-header {{ display: flex; justify-content: space-between; align-items: center; padding: 10px 15px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; }}
-        .context-header strong {{ font-size: 14px; }}
-        .context-length {{ font-size: 12px; opacity: 0.9; background-color: rgba(255,255,255,0.2); padding: 3px 8px; border-radius: 10px; }}
-        .context-text {{ padding: 15px; max-height: 300px; overflow-y: auto; line-height: 1.8; color: #333; font-size: 14px; text-align: justify; }}
-        .context-text::-webkit-scrollbar {{ width: 8px; }}
-        .context-text::-webkit-scrollbar-track {{ background: #f1f1f1; border-radius: 4px; }}
-        .context-text::-webkit-scrollbar-thumb {{ background: #888; border-radius: 4px; }}
-        .context-text::-webkit-scrollbar-thumb:hover {{ background: #555; }}
-        .metrics-table {{ width: 100%; background-color: white; }}
-        .metrics-table td {{ padding: 8px; border-bottom: 1px solid #eee; }}
-        .metrics-table td:first-child {{ font-weight: bold; color: #555; width: 40%; }}
-        .metrics-table td:last-child {{ color: #333; text-align: right; }}
+        .modal { display: none; position: fixed; z-index: 1000; left: 0; top: 0; width: 100%; height: 100%; overflow: auto; background-color: rgba(0,0,0,0.5); }
+        .modal-content { background-color: #fefefe; margin: 3% auto; padding: 20px 30px; border: 1px solid #888; border-radius: 8px; width: 80%; max-width: 900px; max-height: 85vh; overflow-y: auto; box-shadow: 0 4px 6px rgba(0,0,0,0.1); }
+        .close { color: #aaa; float: right; font-size: 32px; font-weight: bold; cursor: pointer; line-height: 20px; }
+        .close:hover, .close:focus { color: #000; }
+        .detail-section { margin: 20px 0; padding: 15px; background-color: #f9f9f9; border-radius: 5px; border-left: 4px solid #4CAF50; }
+        .detail-section h3 { margin-top: 0; color: #333; font-size: 16px; }
+        .detail-section p { margin: 10px 0; color: #555; line-height: 1.6; white-space: pre-wrap; word-wrap: break-word; }
+        .context-item { margin: 15px 0; padding: 0; background-color: white; border-radius: 6px; border: 1px solid #ddd; overflow: hidden; box-shadow: 0 2px 4px rgba(0,0,0,0.05); }
+        .context-header { display: flex; justify-content: space-between; align-items: center; padding: 10px 15px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; }
+        .context-header strong { font-size: 14px; }
+        .context-length { font-size: 12px; opacity: 0.9; background-color: rgba(255,255,255,0.2); padding: 3px 8px; border-radius: 10px; }
+        .context-text { padding: 15px; max-height: 300px; overflow-y: auto; line-height: 1.8; color: #333; font-size: 14px; text-align: justify; }
+        .context-text::-webkit-scrollbar { width: 8px; }
+        .context-text::-webkit-scrollbar-track { background: #f1f1f1; border-radius: 4px; }
+        .context-text::-webkit-scrollbar-thumb { background: #888; border-radius: 4px; }
+        .context-text::-webkit-scrollbar-thumb:hover { background: #555; }
+        .metrics-table { width: 100%; background-color: white; }
+        .metrics-table td { padding: 8px; border-bottom: 1px solid #eee; }
+        .metrics-table td:first-child { font-weight: bold; color: #555; width: 40%; }
+        .metrics-table td:last-child { color: #333; text-align: right; }
     </style>
 </head>
 <body>
     <div class="container">
         <h1>📊 RAG 系统测试报告</h1>
-        
+"""
+
+# 报告正文：汇总卡片、统计表、图表和表格头部（表格行之前的部分）
+_HTML_BODY = string.Template("""
         <div class="summary">
             <div class="summary-card">
                 <h3>总测试数</h3>
-                <p>{summary.get('total_tests', 0)}</p>
+                <p>$total_tests</p>
             </div>
             <div class="summary-card" style="background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);">
                 <h3>成功测试</h3>
-                <p>{summary.get('successful_tests', 0)}</p>
+                <p>$successful_tests</p>
             </div>
             <div class="summary-card" style="background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);">
                 <h3>测试问题数</h3>
-                <p>{summary.get('questions', 0)}</p>
+                <p>$questions</p>
             </div>
             <div class="summary-card" style="background: linear-gradient(135deg, #43e97b 0%, #38f9d7 100%);">
                 <h3>检索配置数</h3>
-                <p>{summary.get('test_configs', 0)}</p>
+                <p>$test_configs</p>
             </div>
         </div>
         
@@ -416,65 +175,11 @@ class ReportGenerator:
                 <th>最大值</th>
                 <th>中位数</th>
             </tr>
-"""
-        
-        for metric, values in stats.items():
-            if metric != 'overall_score' and isinstance(values, dict):
-                mean_val = values.get('mean', 0)
-                if mean_val is None:
-                    mean_val = 0
-                metric_class = 'metric-good' if mean_val >= 0.7 else ('metric-medium' if mean_val >= 0.5 else 'metric-poor')
-                
-                # 安全地获取值，处理None
-                def safe_format(val):
-                    return f"{val:.3f}" if val is not None else "N/A"
-                
-                html += f"""
-            <tr>
-                <td>{metric}</td>
-                <td class="{metric_class}">{safe_format(mean_val)}</td>
-                <td>{safe_format(values.get('std'))}</td>
-                <td>{safe_format(values.get('min'))}</td>
-                <td>{safe_format(values.get('max'))}</td>
-                <td>{safe_format(values.get('median'))}</td>
-            </tr>
-"""
-        
-        html += """
+$stats_rows
         </table>
         
         <h2>可视化图表</h2>
-"""
-        
-        # 添加图表（检查是否存在）
-        chart_files = {
-            'radar_chart.png': '指标对比雷达图',
-            'box_plot.png': '指标分布箱线图',
-            'heatmap.png': '检索方式对比热力图',
-            'response_time.png': '响应时间对比'}
-        
-        has_charts = False
-        for img_file, title in chart_files.items():
-            if (self.results_dir / img_file).exists():
-                has_charts = True
-                html += f"""
-        <div class="chart">
-            <h3 style="color: #555; margin-bottom: 10px;">{title}</h3>
-            <img src="{img_file}" alt="{title}">
-        </div>
-"""
-        
-        if not has_charts:
-            html += """
-        <div style="padding: 20px; background-color: #fff3cd; border: 1px solid #ffc107; border-radius: 4px; color: #856404;">
-            <p>⚠️ 暂无可视化图表。图表生成需要安装 matplotlib 和 seaborn:</p>
-            <code style="background-color: #f8f9fa; padding: 5px 10px; border-radius: 3px; display: inline-block; margin-top: 5px;">
-                pip install matplotlib seaborn
-            </code>
-        </div>
-"""
-        
-        html += """
+$chart_blocks
         <h2>📋 详细测试数据</h2>
         <div class="data-controls">
             <div class="search-box">
@@ -484,15 +189,7 @@ class ReportGenerator:
                 <label>检索类型：
                     <select id="searchTypeFilter" onchange="filterTable()">
                         <option value="">全部</option>
-"""
-        
-        # 添加检索类型选项
-        if evaluation_results:
-            search_types = set(r.get('search_type', '') for r in evaluation_results)
-            for st in sorted(search_types):
-                html += f'                        <option value="{st}">{st}</option>\n'
-        
-        html += """                    </select>
+$search_type_options                    </select>
                 </label>
                 <label>每页显示：
                     <select id="pageSize" onchange="changePageSize()">
@@ -525,66 +222,25 @@ class ReportGenerator:
                     </tr>
                 </thead>
                 <tbody id="tableBody">
+""")
+
+_HTML_CHART_BLOCK = string.Template("""
+        <div class="chart">
+            <h3 style="color: #555; margin-bottom: 10px;">$title</h3>
+            <img src="$img_file" alt="$title"$size_attrs loading="lazy" decoding="async">
+        </div>
+""")
+
+_HTML_NO_CHARTS = """
+        <div style="padding: 20px; background-color: #fff3cd; border: 1px solid #ffc107; border-radius: 4px; color: #856404;">
+            <p>⚠️ 暂无可视化图表。图表生成需要安装 matplotlib 和 seaborn:</p>
+            <code style="background-color: #f8f9fa; padding: 5px 10px; border-radius: 3px; display: inline-block; margin-top: 5px;">
+                pip install matplotlib seaborn
+            </code>
+        </div>
 """
-        
-        # 添加表格数据
-        for idx, result in enumerate(evaluation_results, 1):
-            question = result.get('question', '')
-            response = result.get('response', '')
-            reference = result.get('reference', '')
-            search_type = result.get('search_type', '')
-            
-            # 评估指标
-            context_precision = result.get('context_precision', 0)
-            context_recall = result.get('context_recall', 0)
-            faithfulness = result.get('faithfulness', 0)
-            answer_relevancy = result.get('answer_relevancy', 0)
-            answer_correctness = result.get('answer_correctness', 0)
-            answer_similarity = result.get('answer_similarity', 0)
-            response_time = result.get('response_time', 0)
-            
-            # 缩短显示文本
-            question_short = question[:50] + '...' if len(question) > 50 else question
-            response_short = response[:80] + '...' if len(response) > 80 else response
-            reference_short = reference[:80] + '...' if len(reference) > 80 else reference
-            
-            # 根据得分设置颜色类
-            def get_metric_class(score):
-                if score is None:
-                    return 'metric-na'
-                if score >= 0.7:
-                    return 'metric-good'
-                elif score >= 0.5:
-                    return 'metric-medium'
-                else:
-                    return 'metric-poor'
-            
-            # 格式化指标显示
-            def format_metric(value):
-                return f"{value:.3f}" if value is not None else "N/A"
-            
-            def format_time(value):
-                return f"{value:.2f}" if value is not None else "N/A"
-            
-            html += f"""
-                    <tr data-index="{idx}">
-                        <td>{idx}</td>
-                        <td class="text-cell" title="{question}">{question_short}</td>
-                        <td class="text-cell" title="{response}">{response_short}</td>
-                        <td class="text-cell" title="{reference}">{reference_short}</td>
-                        <td>{search_type}</td>
-                        <td class="{get_metric_class(context_precision)}">{format_metric(context_precision)}</td>
-                        <td class="{get_metric_class(context_recall)}">{format_metric(context_recall)}</td>
-                        <td class="{get_metric_class(faithfulness)}">{format_metric(faithfulness)}</td>
-                        <td class="{get_metric_class(answer_relevancy)}">{format_metric(answer_relevancy)}</td>
-                        <td class="{get_metric_class(answer_correctness)}">{format_metric(answer_correctness)}</td>
-                        <td class="{get_metric_class(answer_similarity)}">{format_metric(answer_similarity)}</td>
-                        <td>{format_time(response_time)}</td>
-                        <td><button class="detail-btn" onclick="showDetail({idx})">详情</button></td>
-                    </tr>
-"""
-        
-        html += """
+
+_HTML_TABLE_TAIL = """
                 </tbody>
             </table>
         </div>
@@ -603,15 +259,21 @@ class ReportGenerator:
             </div>
         </div>
         
+        <script src="report_data.js"></script>
         <script>
-        // 存储所有数据
-        const allData = """ + json.dumps(evaluation_results, ensure_ascii=False) + """;
+        // 存储所有数据（由 report_data.js 提供）
+        const allData = window.REPORT_DATA || [];
         let currentPage = 1;
         let pageSize = 20;
         let filteredData = allData;
+        const rowIndex = new Map(allData.map((item, i) => [item, i + 1]));
         
-        // 初始化
-        displayPage();
+        // 初始化：首页行已由服务端渲染，只需更新分页信息；没有预渲染行时再由客户端渲染
+        if (document.getElementById('tableBody').rows.length > 0) {
+            updatePagination();
+        } else {
+            displayPage();
+        }
         
         function filterTable() {
             const searchText = document.getElementById('searchInput').value.toLowerCase();
@@ -639,21 +301,18 @@ class ReportGenerator:
         }
         
         function displayPage() {
-            const totalPages = Math.ceil(filteredData.length / pageSize);
             const start = (currentPage - 1) * pageSize;
             const end = start + pageSize;
             
-            // 隐藏所有行
-            const rows = document.querySelectorAll('#tableBody tr');
-            rows.forEach(row => row.style.display = 'none');
-            
-            // 显示当前页的行
+            // 只渲染当前页的行
             const displayData = filteredData.slice(start, end);
-            displayData.forEach(item => {
-                const index = item.test_metadata?.test_id || allData.indexOf(item) + 1;
-                const row = document.querySelector(`tr[data-index="${index}"]`);
-                if (row) row.style.display = '';
-            });
+            document.getElementById('tableBody').innerHTML = displayData.map(renderRow).join('');
+            
+            updatePagination();
+        }
+        
+        function updatePagination() {
+            const totalPages = Math.ceil(filteredData.length / pageSize);
             
             // 更新分页信息
             document.getElementById('pageInfo').textContent = 
@@ -664,6 +323,45 @@ class ReportGenerator:
             document.getElementById('nextBtn').disabled = currentPage >= totalPages;
         }
         
+        const _ESC = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'};
+        function escapeHtml(text) {
+            return String(text ?? '').replace(/[&<>"']/g, ch => _ESC[ch]);
+        }
+        
+        function textCell(text, width) {
+            text = String(text ?? '');
+            const short = text.length > width ? text.slice(0, width) + '...' : text;
+            return `<td class="text-cell" title="${escapeHtml(text)}">${escapeHtml(short)}</td>`;
+        }
+        
+        function metricCell(value) {
+            // 缺失的指标按 0 处理，空值显示为 N/A
+            if (value === undefined) value = 0;
+            if (value === null || isNaN(value)) return '<td class="metric-na">N/A</td>';
+            const cls = value >= 0.7 ? 'metric-good' : value >= 0.5 ? 'metric-medium' : 'metric-poor';
+            return `<td class="${cls}">${Number(value).toFixed(3)}</td>`;
+        }
+        
+        function renderRow(item) {
+            const index = rowIndex.get(item);
+            const responseTime = item.response_time === undefined ? 0 : item.response_time;
+            return `<tr data-index="${index}">
+                <td>${index}</td>
+                ${textCell(item.question, 50)}
+                ${textCell(item.response, 80)}
+                ${textCell(item.reference, 80)}
+                <td>${escapeHtml(item.search_type)}</td>
+                ${metricCell(item.context_precision)}
+                ${metricCell(item.context_recall)}
+                ${metricCell(item.faithfulness)}
+                ${metricCell(item.answer_relevancy)}
+                ${metricCell(item.answer_correctness)}
+                ${metricCell(item.answer_similarity)}
+                <td>${responseTime === null || isNaN(responseTime) ? 'N/A' : Number(responseTime).toFixed(2)}</td>
+                <td><button class="detail-btn" onclick="showDetail(${index})">详情</button></td>
+            </tr>`;
+        }
+        
         function previousPage() {
             if (currentPage > 1) {
                 currentPage--;
@@ -684,20 +382,29 @@ class ReportGenerator:
             alert('排序功能开发中...');
         }
         
+        // 文本清理函数：一次扫描完成空白合并（含换行符）、逗号周围空格规范化和 HTML 转义
+        function _cleanRaw(text) {
+            return String(text)
+                .replace(/\\s*,\\s*|\\s+|[&<>"']/g, m => _ESC[m] || (m.includes(',') ? ', ' : ' '))
+                .trim();                         // 移除首尾空格
+        }
+        
+        // 清理结果按原文缓存，重复打开同一条详情时不再重新扫描
+        const _cleanCache = new Map();
+        function cleanText(text) {
+            if (!text) return '';
+            let cleaned = _cleanCache.get(text);
+            if (cleaned === undefined) {
+                cleaned = _cleanRaw(text);
+                _cleanCache.set(text, cleaned);
+            }
+            return cleaned;
+        }
+        
         function showDetail(index) {
             const data = allData[index - 1];
             if (!data) return;
             
-            // 文本清理函数：移除多余空格和换行符
-            function cleanText(text) {
-                if (!text) return '';
-                return text
-                    .replace(/\\n+/g, ' ')           // 将换行符替换为空格
-                    .replace(/\s+/g, ' ')            // 将多个空格合并为一个
-                    .replace(/\s*,\s*/g, ', ')       // 规范化逗号周围的空格
-                    .trim();                         // 移除首尾空格
-            }
-            
             const contexts = data.retrieved_contexts || [];
             const contextHtml = contexts.map((ctx, i) => {
                 const cleanedText = cleanText(ctx);
@@ -752,15 +459,15 @@ class ReportGenerator:
                         <tr><td>答案相关性</td><td>${(data.answer_relevancy || 0).toFixed(3)}</td></tr>
                         <tr><td>答案正确性</td><td>${(data.answer_correctness || 0).toFixed(3)}</td></tr>
                         <tr><td>答案相似度</td><td>${(data.answer_similarity || 0).toFixed(3)}</td></tr>
-                        <tr><td>响应时间</td><td>${(data.response_time || 0).toFixed(2)}s</td></tr>
+                        <tr><td>响应时间</td><td>${data.response_time == null ? 'N/A' : data.response_time.toFixed(2) + 's'}</td></tr>
                     </table>
                 </div>
                 <div class="detail-section">
                     <h3>⚙️ 配置信息</h3>
-                    <p><strong>检索类型:</strong> ${data.search_type || '未知'}</p>
-                    <p><strong>配置名称:</strong> ${data.config_name || '未知'}</p>
-                    <p><strong>向量权重:</strong> ${data.vector_weight || 'N/A'}</p>
-                    <p><strong>BM25权重:</strong> ${data.bm25_weight || 'N/A'}</p>
+                    <p><strong>检索类型:</strong> ${escapeHtml(data.search_type || '未知')}</p>
+                    <p><strong>配置名称:</strong> ${escapeHtml(data.config_name || '未知')}</p>
+                    <p><strong>向量权重:</strong> ${escapeHtml(data.vector_weight || 'N/A')}</p>
+                    <p><strong>BM25权重:</strong> ${escapeHtml(data.bm25_weight || 'N/A')}</p>
                 </div>
             `;
             
@@ -780,16 +487,791 @@ class ReportGenerator:
             }
         }
         </script>
-        
+"""
+
+_HTML_FOOTER = string.Template("""
         <div class="footer">
-            <p>RAG 测试系统 | 生成时间: """ + pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S') + """</p>
+            <p>RAG 测试系统 | 生成时间: $timestamp</p>
         </div>
     </div>
 </body>
 </html>
-"""
+""")
+
+
+@lru_cache(maxsize=1)
+def _mpl():
+    """
+    导入 matplotlib 和 seaborn 并完成绘图配置（只执行一次）
+    
+    绘图函数中再次调用时直接返回缓存结果
+    
+    Returns:
+        tuple: (matplotlib, seaborn)
+    """
+    import matplotlib
+    matplotlib.use('Agg')  # 非交互式后端
+    import seaborn as sns
+    sns.set_style("whitegrid")
+    matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans']  # 支持中文
+    matplotlib.rcParams['axes.unicode_minus'] = False
+    return matplotlib, sns
+
+
+def _search_type_colors(search_types) -> Dict[str, Any]:
+    """
+    为检索方式分配颜色（按名称排序后依次取色），各图表中同一检索方式的颜色一致
+    
+    Args:
+        search_types: 检索方式名称
+        
+    Returns:
+        Dict: 检索方式名称 -> 颜色
+    """
+    _, sns = _mpl()
+    palette = sns.color_palette(_PALETTE_NAME, n_colors=_PALETTE_SIZE)
+    return {name: palette[i % len(palette)] for i, name in enumerate(sorted(set(search_types)))}
+
+
+def _new_figure(width: float, height: float):
+    """创建挂载 Agg 画布的 Figure（不经过 pyplot 的全局状态）"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    
+    fig = Figure(figsize=(width, height))
+    FigureCanvasAgg(fig)
+    fig.set_layout_engine('constrained')
+    return fig
+
+
+def _render_radar_chart(grouped: pd.DataFrame, colors: Dict[str, Any], file_path: str) -> str:
+    """绘制雷达图"""
+    available_metrics = list(grouped.columns)
+    
+    # 雷达图
+    angles = np.linspace(0, 2 * np.pi, len(available_metrics), endpoint=False).tolist()
+    angles += angles[:1]
+    
+    fig = _new_figure(8, 6)
+    fig.get_layout_engine().set(w_pad=0.4)  # 极坐标刻度标签不计入布局，预留左右边距
+    ax = fig.add_subplot(projection='polar')
+    
+    for search_type in grouped.index:
+        color = colors[str(search_type)]
+        values = grouped.loc[search_type].tolist()
+        values += values[:1]
+        ax.plot(angles, values, 'o-', linewidth=2, label=search_type, color=color)
+        ax.fill(angles, values, alpha=0.15, color=color)
+    
+    ax.set_xticks(angles[:-1])
+    ax.set_xticklabels(available_metrics)
+    ax.set_ylim(0, 1)
+    ax.set_title('检索方式指标对比 (雷达图)', size=16, pad=20)
+    fig.legend(loc='outside right upper')
+    ax.grid(True)
+    
+    fig.savefig(file_path, dpi=_CHART_DPI, pil_kwargs=_PNG_SAVE_KWARGS)
+    return file_path
+
+
+def _render_box_plot(df_melted: pd.DataFrame, colors: Dict[str, Any], file_path: str) -> str:
+    """绘制箱线图"""
+    _, sns = _mpl()
+    
+    fig = _new_figure(14, 8)
+    ax = fig.add_subplot()
+    sns.boxplot(data=df_melted, x='metric', y='score', hue='search_type',
+                hue_order=sorted(colors), palette=colors, ax=ax)
+    
+    ax.set_title('各指标得分分布 (箱线图)', size=16)
+    ax.set_xlabel('指标', size=12)
+    ax.set_ylabel('得分', size=12)
+    ax.set_xticklabels(ax.get_xticklabels(), **_TICK_ROT)
+    handles, labels = ax.get_legend_handles_labels()
+    ax.get_legend().remove()
+    fig.legend(handles, labels, title='检索方式', loc='outside right upper')
+    ax.grid(True, alpha=0.3)
+    
+    fig.savefig(file_path, dpi=_CHART_DPI, pil_kwargs=_PNG_SAVE_KWARGS)
+    return file_path
+
+
+def _render_response_time_chart(grouped: pd.DataFrame, colors: Dict[str, Any], file_path: str) -> str:
+    """绘制响应时间对比图"""
+    fig = _new_figure(10, 6)
+    ax = fig.add_subplot()
+    
+    grouped['mean'].plot(kind='bar', yerr=grouped['std'], ax=ax,
+                         color=[colors[str(search_type)] for search_type in grouped.index])
+    
+    ax.set_title('平均响应时间对比', size=16)
+    ax.set_xlabel('检索方式', size=12)
+    ax.set_ylabel('响应时间 (秒)', size=12)
+    ax.set_xticklabels(ax.get_xticklabels(), **_TICK_ROT)
+    ax.grid(True, alpha=0.3, axis='y')
+    
+    fig.savefig(file_path, dpi=_CHART_DPI, pil_kwargs=_PNG_SAVE_KWARGS)
+    return file_path
+
+
+def _render_heatmap(mean_data: pd.DataFrame, file_path: str) -> str:
+    """绘制热力图"""
+    _, sns = _mpl()
+    
+    fig = _new_figure(12, 6)
+    ax = fig.add_subplot()
+    sns.heatmap(mean_data.T, annot=True, fmt='.3f', cmap='YlOrRd', ax=ax,
+               cbar_kws={'label': '平均得分'})
+    
+    ax.set_title('检索方式 × 指标热力图', size=16)
+    ax.set_xlabel('检索方式', size=12)
+    ax.set_ylabel('指标', size=12)
+    
+    fig.savefig(file_path, dpi=_CHART_DPI, pil_kwargs=_PNG_SAVE_KWARGS)
+    return file_path
+
+
+# Parquet 缓存中记录源 CSV 签名（纳秒级修改时间、文件大小）的 DataFrame.attrs 键
+_PARQUET_SOURCE_ATTR = 'source_csv'
+
+
+def _read_results_table(csv_file: Path) -> pd.DataFrame:
+    """
+    读取评估结果中图表所需的列
+    
+    首次读取 CSV 后把这些列缓存为同目录下的同名 Parquet 文件（evaluation_results.parquet），
+    并在其元数据中记录 CSV 的纳秒级修改时间和大小；两者都与当前 CSV 一致时直接内存映射读取 Parquet
+    （不依赖文件系统的时间戳精度），删除该文件不影响结果
+    
+    Args:
+        csv_file: evaluation_results.csv 路径
+        
+    Returns:
+        DataFrame: 评估结果
+    """
+    csv_stat = csv_file.stat()
+    source = [csv_stat.st_mtime_ns, csv_stat.st_size]
+    
+    parquet_file = csv_file.with_suffix('.parquet')
+    if parquet_file.exists() and parquet_file.stat().st_mtime_ns >= csv_stat.st_mtime_ns:
+        try:
+            df = pd.read_parquet(parquet_file, engine='pyarrow', memory_map=True)
+        except Exception as e:
+            logger.warning(f"读取 Parquet 缓存失败，改为读取 CSV: {e}")
+        else:
+            if df.attrs.pop(_PARQUET_SOURCE_ATTR, None) == source:
+                return df
+    
+    # 只解析图表需要的列
+    header = pd.read_csv(csv_file, nrows=0).columns
+    columns = [col for col in _CHART_COLUMNS if col in header]
+    
+    # pyarrow 多线程解析 CSV，比 pandas 单线程解析器快
+    if pacsv is not None:
+        df = pacsv.read_csv(
+            csv_file,
+            convert_options=pacsv.ConvertOptions(include_columns=columns)
+        ).to_pandas()
+    else:
+        df = pd.read_csv(csv_file, usecols=columns)
+    
+    # 指标列降为 float32、检索类型转为分类，减少内存并加快分组
+    metric_columns = [col for col in columns if col not in ('search_type', 'response_time')]
+    df[metric_columns] = df[metric_columns].astype('float32')
+    if 'search_type' in df.columns:
+        df['search_type'] = df['search_type'].astype('category')
+    
+    # 先写临时文件再替换，写入中断时不会留下不完整且比 CSV 更新的缓存
+    tmp_file = parquet_file.with_suffix('.parquet.tmp')
+    df.attrs[_PARQUET_SOURCE_ATTR] = source
+    try:
+        df.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, parquet_file)
+    except Exception as e:
+        logger.debug(f"写入 Parquet 缓存失败: {e}")
+        tmp_file.unlink(missing_ok=True)
+    finally:
+        del df.attrs[_PARQUET_SOURCE_ATTR]
+    
+    return df
+
+
+# 以下加载函数按 (路径, 修改时间) 缓存：同一进程内重复打开同一结果目录且文件未变化时不再重新解析。
+# 返回的对象在多个 ReportGenerator 之间共享，调用方不得原地修改。
+def _file_key(path: Path) -> Tuple[str, int]:
+    """缓存键：文件路径和纳秒级修改时间"""
+    return str(path), path.stat().st_mtime_ns
+
+
+@lru_cache(maxsize=8)
+def _load_results_table(path: str, mtime_ns: int) -> pd.DataFrame:
+    """加载评估结果表"""
+    return _read_results_table(Path(path))
+
+
+@lru_cache(maxsize=8)
+def _load_comparison(path: str, mtime_ns: int) -> pd.DataFrame:
+    """
+    加载检索方式对比结果
+    
+    列名为展平后的 "指标_统计量"（如 context_precision_mean）
+    """
+    comparison = pd.read_csv(path, index_col=0, engine='c', memory_map=True)
+    if not any(str(col).endswith('_mean') for col in comparison.columns):
+        # 旧版结果目录中的两行表头格式
+        comparison = pd.read_csv(path, header=[0, 1], index_col=0, engine='c', memory_map=True)
+        comparison.columns = [f"{metric}_{stat}" for metric, stat in comparison.columns]
+    # 统计值均为数值列，与评估结果表一致降为 float32
+    return comparison.astype('float32')
+
+
+@lru_cache(maxsize=8)
+def _load_report(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """加载测试报告"""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _png_size(path: str) -> Optional[Tuple[int, int]]:
+    """
+    从 PNG 文件头（IHDR 块）读取图片宽高，无需解码图片
+    
+    Returns:
+        (宽, 高)；文件不是有效 PNG 时返回 None
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(24)
+    except OSError:
+        return None
+    if len(header) < 24 or header[:8] != b'\x89PNG\r\n\x1a\n' or header[12:16] != b'IHDR':
+        return None
+    return struct.unpack('>II', header[16:24])
+
+
+class ReportGenerator:
+    """报告生成器"""
+    
+    def __init__(self, results_dir: str):
+        """
+        初始化报告生成器
+        
+        Args:
+            results_dir: 结果目录
+        """
+        self.results_dir = Path(results_dir)
+        
+        # 加载评估结果（df_results 只包含图表所需的列）
+        self.df_results = None
+        self.comparison = None
+        self.report = None
+        
+        # 各图表共用的派生数据，加载结果后只计算一次
+        self._cols = frozenset()  # df_results 的列名快照
+        self._available_metrics = []
+        self._grouped_mean = None
+        self._mean_matrix = None  # 对比结果中的 mean 矩阵（检索类型 × 指标）
+        self._df_long = None  # 长表形式的指标得分（search_type, metric, score）
+        self._colors = {}  # 检索方式 -> 图表颜色
+        
+        self._load_results()
+    
+    def _load_results(self):
+        """加载结果文件"""
+        try:
+            # 加载评估结果
+            csv_file = self.results_dir / "evaluation_results.csv"
+            if csv_file.exists():
+                self.df_results = _load_results_table(*_file_key(csv_file))
+                self._cols = frozenset(self.df_results.columns)
+                logger.info(f"加载评估结果: {len(self.df_results)} 条")
+            
+            # 加载对比结果
+            comparison_file = self.results_dir / "search_type_comparison.csv"
+            if comparison_file.exists():
+                self.comparison = _load_comparison(*_file_key(comparison_file))
+                logger.info(f"加载对比结果: {len(self.comparison)} 种配置")
+                self._mean_matrix = self.comparison.filter(regex='_mean$').rename(
+                    columns=lambda col: col[:-len('_mean')]
+                )
+            
+            if self.df_results is not None:
+                self._prepare_chart_data()
+            
+            # 加载测试报告
+            report_file = self.results_dir / "test_report.json"
+            if report_file.exists():
+                self.report = _load_report(*_file_key(report_file))
+                logger.info("加载测试报告")
+        
+        except Exception as e:
+            logger.error(f"加载结果文件失败: {e}")
+    
+    def _prepare_chart_data(self):
+        """
+        预先计算各图表共用的数据：可用指标列表、指标得分长表和按检索类型分组的均值
+        
+        对比结果中已有各检索类型的指标均值时直接复用，不再对评估结果分组
+        """
+        self._available_metrics = [m for m in _METRICS if m in self._cols]
+        
+        if 'search_type' not in self._cols or not self._available_metrics:
+            return
+        
+        # 长表只转换一次，供箱线图等分布类图表共用（已去除空值）
+        # 指标名转为分类、得分保持 float32，长表内存与宽表相当
+        df_long = self.df_results.melt(
+            id_vars=['search_type'],
+            value_vars=self._available_metrics,
+            var_name='metric',
+            value_name='score'
+        ).dropna(subset=['score'])
+        self._df_long = df_long.astype({
+            'metric': pd.CategoricalDtype(self._available_metrics),
+            'score': 'float32',
+        })
+        
+        if self._mean_matrix is not None and set(self._available_metrics) <= set(self._mean_matrix.columns):
+            self._grouped_mean = self._mean_matrix[self._available_metrics]
+        else:
+            # 先取出所需列再分组，分组时不再经过其他列
+            narrow = self.df_results.loc[:, ['search_type', *self._available_metrics]]
+            self._grouped_mean = narrow.groupby('search_type', observed=True).mean()
+    
+    def generate_visualizations(self) -> List[str]:
+        """
+        生成可视化图表
+        
+        先准备好各图表的数据，再依次绘制（四张图直接绘制比启动进程池更快）
+        
+        Returns:
+            List[str]: 生成的图表文件路径列表
+        """
+        try:
+            _mpl()
+        except ImportError:
+            logger.error("需要安装 matplotlib 和 seaborn: pip install matplotlib seaborn")
+            return []
+        
+        generated_files = []
+        
+        if self.df_results is None or len(self.df_results) == 0:
+            logger.warning("没有评估结果可供可视化")
+            self._remove_stale_charts(generated_files)
+            return generated_files
+        
+        try:
+            # 所有图表共用同一份检索方式配色
+            self._colors = _search_type_colors(self._search_types())
+            
+            # 1. 指标对比雷达图  2. 指标箱线图  3. 响应时间对比  4. 指标热力图
+            jobs = [
+                job for job in (
+                    self._radar_chart_job(),
+                    self._box_plot_job(),
+                    self._response_time_chart_job(),
+                    self._heatmap_job(),
+                )
+                if job is not None
+            ]
+            
+            # 图表文件比输入数据新时无需重新绘制
+            inputs = (
+                self.results_dir / "evaluation_results.csv",
+                self.results_dir / "search_type_comparison.csv",
+            )
+            pending = []
+            for name, render, args in jobs:
+                file_path = args[-1]
+                if self._needs_rebuild(Path(file_path), *inputs):
+                    pending.append((name, render, args))
+                else:
+                    logger.info(f"{name}已是最新，跳过生成: {file_path}")
+                    generated_files.append(file_path)
+            
+            for name, render, args in pending:
+                try:
+                    file_path = render(*args)
+                except Exception as e:
+                    logger.error(f"生成{name}失败: {e}")
+                    continue
+                if file_path:
+                    logger.info(f"{name}已保存: {file_path}")
+                    generated_files.append(file_path)
+            
+            logger.info(f"生成了 {len(generated_files)} 个可视化图表")
+            
+        except Exception as e:
+            logger.error(f"生成可视化图表失败: {e}")
+        
+        self._remove_stale_charts(generated_files)
+        
+        return generated_files
+    
+    def _remove_stale_charts(self, generated_files: List[str]):
+        """
+        删除本次未生成的图表文件（如数据不足跳过的图表），
+        避免 HTML 报告继续引用上一次运行留下的旧图表
+        """
+        generated_names = {Path(file_path).name for file_path in generated_files}
+        for img_file in _REPORT_CHARTS:
+            if img_file not in generated_names:
+                chart_file = self.results_dir / img_file
+                if chart_file.exists():
+                    logger.info(f"删除本次未生成的旧图表: {chart_file}")
+                    chart_file.unlink()
+    
+    def _search_types(self) -> List[str]:
+        """评估结果和对比结果中出现的所有检索方式名称"""
+        search_types = set()
+        if 'search_type' in self._cols:
+            column = self.df_results['search_type']
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                search_types.update(map(str, column.cat.categories))
+            else:
+                search_types.update(map(str, column.dropna().unique()))
+        if self._mean_matrix is not None:
+            search_types.update(map(str, self._mean_matrix.index))
+        return sorted(search_types)
+    
+    def _radar_chart_job(self) -> Optional[Tuple[str, Callable, tuple]]:
+        """准备雷达图的绘制任务"""
+        if 'search_type' not in self._cols:
+            return None
+        
+        if len(self._available_metrics) < 3:
+            return None
+        
+        # 每种检索类型的平均值（加载结果时已计算）
+        file_path = self.results_dir / "radar_chart.png"
+        return '雷达图', _render_radar_chart, (self._grouped_mean, self._colors, str(file_path))
+    
+    def _box_plot_job(self) -> Optional[Tuple[str, Callable, tuple]]:
+        """准备箱线图的绘制任务"""
+        if 'search_type' not in self._cols:
+            return None
+        
+        available_metrics = self._available_metrics
+        
+        if len(available_metrics) < 2:
+            return None
+        
+        # 长表数据在加载结果时已准备好
+        df_melted = self._df_long
+        
+        if len(df_melted) == 0:
+            logger.warning("箱线图：所有数据为空，跳过生成")
+            return None
+        
+        file_path = self.results_dir / "box_plot.png"
+        return '箱线图', _render_box_plot, (df_melted, self._colors, str(file_path))
+    
+    def _response_time_chart_job(self) -> Optional[Tuple[str, Callable, tuple]]:
+        """准备响应时间对比图的绘制任务"""
+        if 'response_time' not in self._cols or 'search_type' not in self._cols:
+            return None
+        
+        # 没有任何响应时间数据时不绘制空图
+        if not self.df_results['response_time'].notna().any():
+            logger.warning("响应时间图：所有数据为空，跳过生成")
+            return None
+        
+        narrow = self.df_results.loc[:, ['search_type', 'response_time']]
+        grouped = narrow.groupby('search_type', observed=True)['response_time'].agg(['mean', 'std'])
+        
+        file_path = self.results_dir / "response_time.png"
+        return '响应时间图', _render_response_time_chart, (grouped, self._colors, str(file_path))
+    
+    def _heatmap_job(self) -> Optional[Tuple[str, Callable, tuple]]:
+        """准备热力图的绘制任务"""
+        if self.comparison is None or len(self.comparison) == 0:
+            return None
+        
+        # mean 值在加载对比结果时已提取
+        file_path = self.results_dir / "heatmap.png"
+        return '热力图', _render_heatmap, (self._mean_matrix, str(file_path))
+    
+    def _load_first_results(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        流式读取详细评估结果的前 limit 条（服务端渲染表格首页用）
+        
+        完整数据由 report_data.js 原样拷贝提供，无需解析整个文件；总条数取自 test_report.json
+        """
+        json_file = self.results_dir / "evaluation_results.json"
+        if not json_file.exists():
+            return []
+        
+        try:
+            with open(json_file, 'rb') as f:
+                results = list(islice(ijson.items(f, 'item', use_float=True), limit))
+        except Exception as e:
+            logger.error(f"加载评估结果失败: {e}")
+            return []
+        
+        total = self.report.get('test_summary', {}).get('successful_tests', len(results))
+        logger.info(f"读取了前 {len(results)} 条详细评估结果（共 {total} 条）")
+        return results
+    
+    def generate_html_report(self) -> str:
+        """
+        生成 HTML 报告
+        
+        Returns:
+            str: HTML 文件路径
+        """
+        if self.df_results is None or self.report is None:
+            logger.warning("缺少必要数据，无法生成 HTML 报告")
+            return None
+        
+        file_path = self.results_dir / "report.html"
+        data_file = self.results_dir / "report_data.js"
+        json_file = self.results_dir / "evaluation_results.json"
+        
+        # 报告和数据脚本都比输入文件新时直接复用
+        inputs = [
+            self.results_dir / name
+            for name in ("evaluation_results.csv", "search_type_comparison.csv", "test_report.json", *_REPORT_CHARTS)
+        ]
+        inputs.append(json_file)
+        if not self._needs_rebuild(file_path, *inputs) and not self._needs_rebuild(data_file, json_file):
+            logger.info(f"HTML 报告已是最新，跳过生成: {file_path}")
+            return str(file_path)
+        
+        try:
+            self._write_report_data()
+            
+            # 1MB 写缓冲，片段边生成边写出；先写临时文件，完整写完后再替换，
+            # 避免中途失败留下不完整且比输入更新的报告
+            tmp_file = file_path.with_suffix('.html.tmp')
+            with open(tmp_file, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
+                self._stream_html_content(f)
+            os.replace(tmp_file, file_path)
+            
+            logger.info(f"HTML 报告已保存: {file_path}")
+            return str(file_path)
+            
+        except Exception as e:
+            logger.error(f"生成 HTML 报告失败: {e}")
+            return None
+    
+    @staticmethod
+    def _needs_rebuild(out_path: Path, *inputs: Path) -> bool:
+        """
+        判断输出文件是否需要重新生成
+        
+        Args:
+            out_path: 输出文件路径
+            *inputs: 输入文件路径（不存在的输入忽略）
+            
+        Returns:
+            bool: 输出文件不存在或早于任一输入文件时返回 True
+        """
+        if not out_path.exists():
+            return True
+        
+        out_mtime = out_path.stat().st_mtime
+        return any(p.exists() and p.stat().st_mtime > out_mtime for p in inputs)
+    
+    def _write_report_data(self) -> Path:
+        """
+        将详细评估结果写为报告同目录下的 report_data.js，由 HTML 通过 <script src> 加载
+        
+        直接拷贝 evaluation_results.json 的字节，不经过反序列化和序列化；
+        不使用 fetch()，以便以 file:// 直接打开报告时同样可用
+        
+        Returns:
+            Path: 数据脚本路径
+        """
+        data_file = self.results_dir / "report_data.js"
+        json_file = self.results_dir / "evaluation_results.json"
+        
+        with open(data_file, 'wb', buffering=_WRITE_BUFFER_SIZE) as out:
+            out.write(b'window.REPORT_DATA = ')
+            if json_file.exists():
+                with open(json_file, 'rb') as src:
+                    shutil.copyfileobj(src, out, _WRITE_BUFFER_SIZE)
+            else:
+                out.write(b'[]')
+            out.write(b';\n')
+        
+        return data_file
+    
+    def _build_table_rows(self, evaluation_results: List[Dict[str, Any]]) -> str:
+        """
+        构建详细数据表格的所有行
+        
+        按列向量化处理文本截断、指标着色和格式化，避免逐行的字典查找和 f-string 拼接
+        
+        Args:
+            evaluation_results: 详细评估结果
+            
+        Returns:
+            str: 表格行 HTML
+        """
+        if not evaluation_results:
+            return ""
+        
+        df = pd.DataFrame(evaluation_results)
+        n = len(df)
+        
+        def text_column(name: str) -> pd.Series:
+            if name not in df.columns:
+                return pd.Series([''] * n)
+            return df[name].fillna('').astype(str)
+        
+        def shorten(text: pd.Series, width: int) -> pd.Series:
+            # 超出长度的文本截断并追加省略号（先截断再转义，避免截断实体）
+            short = text.str.slice(0, width) + np.where(text.str.len() > width, '...', '')
+            return short.map(html.escape)
+        
+        def metric_cell(name: str) -> pd.Series:
+            # 缺失的指标列按 0 处理，空值显示为 N/A
+            values = df[name] if name in df.columns else pd.Series([0.0] * n)
+            values = pd.to_numeric(values, errors='coerce')
+            classes = np.select(
+                [values.isna(), values >= 0.7, values >= 0.5],
+                ['metric-na', 'metric-good', 'metric-medium'],
+                default='metric-poor'
+            )
+            formatted = np.where(values.notna(), np.char.mod('%.3f', values.to_numpy(dtype=float)), 'N/A')
+            return '<td class="' + pd.Series(classes) + '">' + pd.Series(formatted) + '</td>'
+        
+        question = text_column('question')
+        response = text_column('response')
+        reference = text_column('reference')
+        
+        # 用户文本需转义后才能放入属性和单元格
+        question_esc = question.map(html.escape)
+        response_esc = response.map(html.escape)
+        reference_esc = reference.map(html.escape)
+        
+        response_time = pd.to_numeric(
+            df['response_time'] if 'response_time' in df.columns else pd.Series([0.0] * n),
+            errors='coerce'
+        )
+        response_time = pd.Series(np.where(
+            response_time.notna(), np.char.mod('%.2f', response_time.to_numpy(dtype=float)), 'N/A'
+        ))
+        
+        idx = pd.Series(np.arange(1, n + 1)).astype(str)
+        indent = "\n                        "
+        rows = (
+            '\n                    <tr data-index="' + idx + '">'
+            + indent + '<td>' + idx + '</td>'
+            + indent + '<td class="text-cell" title="' + question_esc + '">' + shorten(question, 50) + '</td>'
+            + indent + '<td class="text-cell" title="' + response_esc + '">' + shorten(response, 80) + '</td>'
+            + indent + '<td class="text-cell" title="' + reference_esc + '">' + shorten(reference, 80) + '</td>'
+            + indent + '<td>' + text_column('search_type').map(html.escape) + '</td>'
+            + sum((indent + metric_cell(m) for m in _METRICS), pd.Series([''] * n))
+            + indent + '<td>' + response_time + '</td>'
+            + indent + '<td><button class="detail-btn" onclick="showDetail(' + idx + ')">详情</button></td>'
+            + '\n                    </tr>\n'
+        )
+        
+        return rows.str.cat()
+    
+    def _build_stats_rows(self, stats: Dict[str, Any]) -> str:
+        """
+        构建整体指标统计表格的所有行
+        
+        各指标的统计值整理成 DataFrame 后按列着色和格式化
+        
+        Args:
+            stats: 测试报告中的 summary_statistics
+            
+        Returns:
+            str: 表格行 HTML
+        """
+        metric_stats = {
+            metric: values for metric, values in stats.items()
+            if metric != 'overall_score' and isinstance(values, dict)
+        }
+        if not metric_stats:
+            return ""
+        
+        columns = ['mean', 'std', 'min', 'max', 'median']
+        df = pd.DataFrame.from_dict(metric_stats, orient='index').reindex(columns=columns)
+        df = df.apply(pd.to_numeric, errors='coerce')
+        df['mean'] = df['mean'].fillna(0)  # 缺失的平均值按 0 处理
+        
+        # 空值显示为 N/A
+        cells = {
+            col: pd.Series(
+                np.where(df[col].notna(), np.char.mod('%.3f', df[col].to_numpy(dtype=float)), 'N/A'),
+                index=df.index
+            )
+            for col in columns
+        }
+        metric_class = pd.Series(
+            np.select([df['mean'] >= 0.7, df['mean'] >= 0.5], ['metric-good', 'metric-medium'], default='metric-poor'),
+            index=df.index
+        )
+        
+        rows = (
+            '\n            <tr>'
+            '\n                <td>' + df.index.to_series().astype(str) + '</td>'
+            + '\n                <td class="' + metric_class + '">' + cells['mean'] + '</td>'
+            + '\n                <td>' + cells['std'] + '</td>'
+            + '\n                <td>' + cells['min'] + '</td>'
+            + '\n                <td>' + cells['max'] + '</td>'
+            + '\n                <td>' + cells['median'] + '</td>'
+            + '\n            </tr>\n'
+        )
+        
+        return rows.str.cat()
+    
+    def _stream_html_content(self, f: TextIO):
+        """
+        按片段把 HTML 内容直接写入文件
+        
+        Args:
+            f: 已打开的文本文件
+        """
+        summary = self.report.get('test_summary', {})
+        stats = self.report.get('summary_statistics', {})
+        
+        f.write(_HTML_HEAD)
+        
+        # 添加图表（一次列出目录，检查图表文件是否存在）
+        with os.scandir(self.results_dir) as entries:
+            present = {entry.name for entry in entries if entry.is_file()}
+        # 写入图片宽高，浏览器加载图片前即可预留版面，避免重排
+        chart_blocks = []
+        for img_file, title in _REPORT_CHARTS.items():
+            if img_file not in present:
+                continue
+            size = _png_size(os.path.join(self.results_dir, img_file))
+            size_attrs = f' width="{size[0]}" height="{size[1]}"' if size else ''
+            chart_blocks.append(
+                _HTML_CHART_BLOCK.substitute(img_file=img_file, title=title, size_attrs=size_attrs)
+            )
+        
+        # 添加检索类型选项（取自已加载的评估结果表，无需逐条遍历详细结果）
+        search_type_options = []
+        if 'search_type' in self._cols:
+            search_types = self.df_results['search_type'].dropna().unique()
+            for st in sorted(map(str, search_types)):
+                st = html.escape(st)
+                search_type_options.append(f'                        <option value="{st}">{st}</option>\n')
+        
+        f.write(_HTML_BODY.substitute(
+            total_tests=summary.get('total_tests', 0),
+            successful_tests=summary.get('successful_tests', 0),
+            questions=summary.get('questions', 0),
+            test_configs=summary.get('test_configs', 0),
+            stats_rows=self._build_stats_rows(stats),
+            chart_blocks=''.join(chart_blocks) or _HTML_NO_CHARTS,
+            search_type_options=''.join(search_type_options),
+        ))
+        
+        # 添加表格数据：只输出第一页，翻页时由脚本根据 allData 渲染
+        f.write(self._build_table_rows(self._load_first_results(_INITIAL_PAGE_SIZE)))
         
-        return html
+        f.write(_HTML_TABLE_TAIL)
+        f.write(_HTML_FOOTER.substitute(timestamp=pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')))
 
 
 # 示例用法
@@ -137,7 +137,9 @@ def main():
     runner = TestRunner(
         spring_ai_url=spring_ai_config['base_url'],
         api_key=api_key,
-        timeout=spring_ai_config.get('timeout', 30)
+        timeout=spring_ai_config.get('timeout', 30),
+        cache_dir=ragas_config.get('cache_dir'),
+        cache_responses=spring_ai_config.get('cache_responses', False)
     )
     
     # 检查 Spring AI 服务是否可用
@@ -157,7 +159,10 @@ def main():
             testset_path=testset_path,
             search_configs=search_configs,
             output_dir=str(output_dir),
-            save_raw_results=output_config.get('save_raw_responses', True)
+            save_raw_results=output_config.get('save_raw_responses', True),
+            concurrency=test_config.get('concurrency', 8),
+            batch_size=test_config.get('batch_size', 0),
+            eval_window=ragas_config.get('eval_window', 0)
         )
         
         # 打印测试摘要
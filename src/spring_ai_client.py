@@ -4,13 +4,37 @@ Spring AI HTTP 客户端
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
 import logging
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Dict, Optional, Tuple
+from dataclasses import dataclass, replace
 import time
 
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时由 requests 使用标准库 json 编解码
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# 连接的 socket 选项：urllib3 默认已关闭 Nagle 算法（TCP_NODELAY），
+# 另外开启 SO_KEEPALIVE，测试间隙较长时空闲连接不会被中间设备静默断开
+_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+
+
+class _SocketOptionsAdapter(HTTPAdapter):
+    """为连接池中的连接设置 socket 选项的 HTTPAdapter"""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = _SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
 
 @dataclass
 class SearchRequest:
@@ -45,22 +69,155 @@ class RagResponse:
     contexts: List[str]
     response_time: float
     search_type: str
+    batch_response_time: Optional[float] = None  # 所在批量请求的整批耗时（秒），逐条请求时为 None
+    batch_size: Optional[int] = None  # 所在批量请求的问题数
 
 
 class SpringAIClient:
     """Spring AI 客户端"""
     
-    def __init__(self, base_url: str, timeout: int = 60):
+    def __init__(
+        self,
+        base_url: str,
+        timeout: int = 60,
+        health_ttl: float = 30.0,
+        pool_size: int = 32,
+        max_retries: int = 3,
+        cache_responses: bool = False,
+        prewarm: bool = False
+    ):
         """
         初始化客户端
         
         Args:
             base_url: Spring AI 服务基础 URL
             timeout: 请求超时时间
+            health_ttl: 健康检查结果的缓存时间（秒），0 表示不缓存
+            pool_size: 连接池大小，应不小于并发请求数
+            max_retries: 连接失败或服务返回 502/503/504 时的最大重试次数
+            cache_responses: 是否在进程内缓存相同请求的响应（命中时 response_time 为 0，
+                需要测量真实延迟时应关闭）
+            prewarm: 是否在初始化时预先建立一个连接
         """
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
         self.session = requests.Session()
+        self.session.headers.update({
+            'Connection': 'keep-alive',
+            'Content-Type': 'application/json'
+        })
+        
+        # 重试策略：指数退避（0.2s, 0.4s, 0.8s ...）
+        self.retry = Retry(
+            total=max_retries,
+            backoff_factor=0.2,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=["POST", "GET"]
+        )
+        self.pool_size = 0
+        self.set_pool_size(pool_size)
+        
+        # 最近一次健康检查通过的时间（time.monotonic）
+        self.health_ttl = health_ttl
+        self._healthy_at: Optional[float] = None
+        
+        # 响应缓存：(url, 请求参数) -> 响应
+        self.cache_responses = cache_responses
+        self._cache: Dict[Tuple, Any] = {}
+        
+        if prewarm:
+            self.prewarm()
+    
+    def set_pool_size(self, pool_size: int):
+        """
+        设置连接池大小
+        
+        并发请求数超过连接池大小时，多出的连接用完即关闭，
+        下次请求需要重新建立 TCP 连接；替换下来的旧适配器会被关闭，释放其连接池
+        
+        Args:
+            pool_size: 每个主机保持的最大连接数
+        """
+        pool_size = max(1, pool_size)
+        if pool_size == self.pool_size:
+            return
+        old_adapters = []
+        for prefix in ('http://', 'https://'):
+            old_adapter = self.session.adapters.get(prefix)
+            if old_adapter is not None and old_adapter not in old_adapters:
+                old_adapters.append(old_adapter)
+        adapter = _SocketOptionsAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=self.retry
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        for old_adapter in old_adapters:
+            old_adapter.close()
+        self.pool_size = pool_size
+    
+    def prewarm(self, connections: int = 1):
+        """
+        预热连接池：同时发起 connections 个健康检查请求，提前建立 TCP 连接并放入连接池，
+        避免首批请求的响应时间包含建立连接的耗时；请求失败时忽略
+        
+        Args:
+            connections: 预先建立的连接数（不超过连接池大小）
+        """
+        connections = max(1, min(connections, self.pool_size))
+        url = f"{self.base_url}/actuator/health"
+        
+        def ping(_):
+            try:
+                self.session.get(url, timeout=5)
+            except requests.exceptions.RequestException as e:
+                logger.debug(f"连接预热失败: {e}")
+        
+        if connections == 1:
+            ping(0)
+            return
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            list(executor.map(ping, range(connections)))
+    
+    def _post_json(self, url: str, payload: Dict[str, Any]) -> Any:
+        """
+        POST JSON 请求并解析响应
+        
+        安装了 orjson 时用它编码请求体、解析响应体（Content-Type 已在会话请求头中设置）；
+        响应体不是合法 JSON 时与 response.json() 一样抛出 requests 的 JSONDecodeError，
+        调用方统一按 RequestException 处理
+        """
+        if orjson is None:
+            response = self.session.post(url, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        
+        response = self.session.post(url, data=orjson.dumps(payload), timeout=self.timeout)
+        response.raise_for_status()
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError as e:
+            raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos) from e
+    
+    def _get_cached(self, cache_key: Tuple) -> Optional[Any]:
+        """查询响应缓存，命中时返回响应时间为 0 的副本"""
+        if not self.cache_responses:
+            return None
+        cached = self._cache.get(cache_key)
+        if cached is None:
+            return None
+        return replace(cached, response_time=0.0)
+    
+    def _put_cached(self, cache_key: Tuple, response: Any) -> Any:
+        """将成功的响应写入缓存并原样返回"""
+        if self.cache_responses:
+            self._cache[cache_key] = response
+        return response
+    
+    def clear_cache(self):
+        """清空响应缓存"""
+        self._cache.clear()
     
     def vector_search(self, question: str, top_k: int = 5) -> SearchResponse:
         """
@@ -115,23 +272,22 @@ class SpringAIClient:
             "bm25Weight": bm25_weight
         }
         
+        cache_key = (url, tuple(payload.items()))
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+        
         start_time = time.time()
         try:
-            response = self.session.post(
-                url, 
-                json=payload, 
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            data = response.json()
+            data = self._post_json(url, payload)
             
             response_time = time.time() - start_time
             
-            return SearchResponse(
+            return self._put_cached(cache_key, SearchResponse(
                 contexts=data.get('contexts', []),
                 search_type=f"hybrid_{vector_weight}_{bm25_weight}",
                 response_time=response_time
-            )
+            ))
         except requests.exceptions.RequestException as e:
             logger.error(f"混合检索失败: {e}")
             raise
@@ -160,29 +316,82 @@ class SpringAIClient:
             "topK": top_k
         }
         
+        cache_key = (url, tuple(payload.items()))
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+        
         start_time = time.time()
         try:
-            response = self.session.post(
-                url, 
-                json=payload, 
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            data = response.json()
+            data = self._post_json(url, payload)
             
             response_time = time.time() - start_time
             
-            return RagResponse(
+            return self._put_cached(cache_key, RagResponse(
                 question=data.get('question', question),
                 answer=data.get('answer', ''),
                 contexts=data.get('contexts', []),
                 response_time=response_time,
                 search_type=search_type
-            )
+            ))
         except requests.exceptions.RequestException as e:
             logger.error(f"RAG 查询失败: {e}")
             raise
     
+    def batch_rag_query(
+        self,
+        questions: List[str],
+        search_type: str = "hybrid",
+        top_k: int = 5
+    ) -> List[RagResponse]:
+        """
+        批量 RAG 查询：一次请求提交多个问题，由服务端合并处理
+        
+        服务端未提供批量接口时返回 404，调用方应退回逐条调用 rag_query
+        
+        Args:
+            questions: 问题列表
+            search_type: 检索类型 (vector/bm25/hybrid)
+            top_k: 返回文档数量
+            
+        Returns:
+            List[RagResponse]: 与 questions 顺序一致；单个问题的响应时间无法测量，
+                response_time 为 NaN，整批耗时记录在 batch_response_time 中
+        """
+        url = f"{self.base_url}/api/rag/qa/batch"
+        payload = {
+            "questions": questions,
+            "searchType": search_type,
+            "topK": top_k
+        }
+        
+        start_time = time.time()
+        try:
+            data = self._post_json(url, payload)
+            
+            batch_response_time = time.time() - start_time
+            
+            # 兼容直接返回列表和 {"results": [...]} 两种格式
+            items = data.get('results', []) if isinstance(data, dict) else data
+            if len(items) != len(questions):
+                raise ValueError(f"批量查询返回 {len(items)} 条结果，期望 {len(questions)} 条")
+            
+            return [
+                RagResponse(
+                    question=item.get('question', question),
+                    answer=item.get('answer', ''),
+                    contexts=item.get('contexts', []),
+                    response_time=float('nan'),
+                    search_type=search_type,
+                    batch_response_time=batch_response_time,
+                    batch_size=len(questions)
+                )
+                for question, item in zip(questions, items)
+            ]
+        except requests.exceptions.RequestException as e:
+            logger.error(f"批量 RAG 查询失败: {e}")
+            raise
+    
     def _search(self, question: str, search_type: str, top_k: int) -> SearchResponse:
         """
         通用检索方法
@@ -201,41 +410,53 @@ class SpringAIClient:
             "topK": top_k
         }
         
+        cache_key = (url, tuple(payload.items()))
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+        
         start_time = time.time()
         try:
-            response = self.session.post(
-                url, 
-                json=payload, 
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            data = response.json()
+            data = self._post_json(url, payload)
             
             response_time = time.time() - start_time
             
-            return SearchResponse(
+            return self._put_cached(cache_key, SearchResponse(
                 contexts=data.get('contexts', []),
                 search_type=search_type,
                 response_time=response_time
-            )
+            ))
         except requests.exceptions.RequestException as e:
             logger.error(f"{search_type} 检索失败: {e}")
             raise
     
-    def health_check(self) -> bool:
+    def health_check(self, use_cache: bool = True) -> bool:
         """
         健康检查
         
+        检查通过后在 health_ttl 秒内直接返回 True，不再请求服务；
+        检查失败的结果不缓存，服务恢复后可立即重新探测
+        
+        Args:
+            use_cache: 是否使用缓存的检查结果
+            
         Returns:
             bool: 服务是否可用
         """
+        if (use_cache and self._healthy_at is not None
+                and time.monotonic() - self._healthy_at < self.health_ttl):
+            return True
+        
         try:
             url = f"{self.base_url}/actuator/health"
             response = self.session.get(url, timeout=5)
-            return response.status_code == 200
+            healthy = response.status_code == 200
         except Exception as e:
             logger.warning(f"健康检查失败: {e}")
-            return False
+            healthy = False
+        
+        self._healthy_at = time.monotonic() if healthy else None
+        return healthy
     
     def close(self):
         """关闭会话"""
@@ -5,18 +5,181 @@
 
 import json
 import logging
+import queue
+import threading
 import time
-from typing import List, Dict, Any, Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Callable, List, Dict, Any, Optional, Union
 from pathlib import Path
 import pandas as pd
+import requests
 from tqdm import tqdm
 
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时退回标准库 json
+    orjson = None
+
 from spring_ai_client import SpringAIClient, RagResponse
 from ragas_evaluator import RagasEvaluator
 
 logger = logging.getLogger(__name__)
 
 
+def _json_line(obj: Any) -> bytes:
+    """将对象序列化为一行 JSON（UTF-8，以换行结尾），用于 JSONL 文件"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+@dataclass
+class TestCase:
+    """测试用例（加载测试集时由 JSON 对象转换一次，测试过程中直接按属性访问）"""
+    __slots__ = ('question', 'ground_truth', 'ground_truth_contexts', 'metadata')
+    
+    question: str
+    ground_truth: str
+    ground_truth_contexts: List[str]
+    metadata: Optional[Dict[str, Any]]
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TestCase':
+        """由测试集中的 JSON 对象创建"""
+        return cls(
+            question=data.get('question', ''),
+            ground_truth=data.get('ground_truth', ''),
+            ground_truth_contexts=data.get('ground_truth_contexts', []),
+            metadata=data.get('metadata')
+        )
+
+
+class TokenBucket:
+    """
+    令牌桶限速器（线程安全）
+    
+    令牌以 rate_qps 的速度补充，最多积累 capacity 个；请求时先预约令牌，
+    令牌不足时只等待补足所需的时间，空闲时的突发请求无需等待
+    """
+    
+    def __init__(self, rate_qps: float, capacity: float = 1.0):
+        """
+        Args:
+            rate_qps: 每秒补充的令牌数，inf 表示不限速
+            capacity: 桶容量（允许的突发请求数）
+        """
+        self.rate_qps = rate_qps
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self) -> float:
+        """
+        预约一个令牌
+        
+        Returns:
+            float: 使用该令牌前需要等待的秒数
+        """
+        if self.rate_qps == float('inf'):
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_qps)
+            self._updated = now
+            self._tokens -= 1
+            return -self._tokens / self.rate_qps if self._tokens < 0 else 0.0
+    
+    def acquire(self):
+        """获取一个令牌，必要时阻塞等待"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class _StreamingEvaluator:
+    """
+    边测试边评估：后台线程收集成功的测试结果，每凑满 window 条
+    （或 max_wait 秒内没有新结果）调用一次 Ragas 评估
+    """
+    
+    _DONE = object()
+    
+    def __init__(self, ragas_evaluator: RagasEvaluator, window: int, max_wait: float = 5.0):
+        """
+        Args:
+            ragas_evaluator: Ragas 评估器
+            window: 每次评估的结果条数
+            max_wait: 未凑满 window 条时最多等待的秒数
+        """
+        self.ragas_evaluator = ragas_evaluator
+        self.window = max(1, window)
+        self.max_wait = max_wait
+        self._queue: queue.Queue = queue.Queue()
+        self._parts: List[pd.DataFrame] = []
+        self._error: Optional[Exception] = None
+        self._thread = threading.Thread(target=self._consume, name="ragas-evaluator", daemon=True)
+        self._thread.start()
+    
+    def put(self, index: int, result: Dict[str, Any]):
+        """提交一条测试结果（index 为其在全部结果中的位置，用于恢复顺序）"""
+        if result['status'] == 'success':
+            self._queue.put((index, result))
+    
+    def finish(self) -> pd.DataFrame:
+        """
+        等待剩余结果评估完成
+        
+        Returns:
+            DataFrame: 包含评估指标的结果（按测试结果的原始顺序）
+        """
+        self._queue.put(self._DONE)
+        self._thread.join()
+        
+        if self._error is not None:
+            raise self._error
+        if not self._parts:
+            logger.error("没有成功的测试结果可供评估")
+            return pd.DataFrame()
+        
+        return pd.concat(self._parts).sort_index(kind='stable').reset_index(drop=True)
+    
+    def _consume(self):
+        batch = []
+        while True:
+            try:
+                item = self._queue.get(timeout=self.max_wait if batch else None)
+            except queue.Empty:
+                item = None  # 等待超时，先评估已收集的结果
+            
+            if item is not None and item is not self._DONE:
+                batch.append(item)
+                if len(batch) < self.window:
+                    continue
+            
+            if batch:
+                self._evaluate(batch)
+                batch = []
+            if item is self._DONE:
+                return
+    
+    def _evaluate(self, batch: List[tuple]):
+        # 出错后不再评估后续结果，错误在 finish() 中抛出
+        if self._error is not None:
+            return
+        indices, results = zip(*batch)
+        try:
+            df_part = self.ragas_evaluator.evaluate_with_metadata(list(results))
+        except Exception as e:
+            logger.error(f"评估失败: {e}")
+            self._error = e
+            return
+        df_part.index = list(indices)
+        self._parts.append(df_part)
+
+
 class TestRunner:
     """测试执行器"""
     
@@ -24,7 +187,9 @@ class TestRunner:
         self,
         spring_ai_url: str,
         api_key: str = None,
-        timeout: int = 30
+        timeout: int = 30,
+        cache_dir: str = None,
+        cache_responses: bool = False
     ):
         """
         初始化测试执行器
@@ -33,13 +198,18 @@ class TestRunner:
             spring_ai_url: Spring AI 服务 URL
             api_key: DashScope API Key
             timeout: 请求超时时间
+            cache_dir: Ragas 评估结果缓存目录，为空时不缓存
+            cache_responses: 是否缓存相同请求的 Spring AI 响应（命中时响应时间记为 0）
         """
-        self.spring_client = SpringAIClient(spring_ai_url, timeout)
-        self.ragas_evaluator = RagasEvaluator(api_key=api_key)
+        self.spring_client = SpringAIClient(spring_ai_url, timeout, cache_responses=cache_responses)
+        self.ragas_evaluator = RagasEvaluator(api_key=api_key, cache_dir=cache_dir)
+        
+        # 服务端是否支持批量查询接口，首次收到 404 后置为 False
+        self._batch_supported = True
         
         logger.info(f"测试执行器初始化完成: {spring_ai_url}")
     
-    def load_testset(self, testset_path: str) -> List[Dict[str, Any]]:
+    def load_testset(self, testset_path: str) -> List[TestCase]:
         """
         加载测试集
         
@@ -47,12 +217,16 @@ class TestRunner:
             testset_path: 测试集文件路径
             
         Returns:
-            List[Dict]: 测试数据列表
+            List[TestCase]: 测试用例列表
         """
         logger.info(f"加载测试集: {testset_path}")
         
-        with open(testset_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # 测试集需被每种检索配置重复遍历，整体读入；有 orjson 时直接解析字节
+        if orjson is not None:
+            data = orjson.loads(Path(testset_path).read_bytes())
+        else:
+            with open(testset_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
         
         # 支持两种格式
         if isinstance(data, list):
@@ -62,6 +236,11 @@ class TestRunner:
         else:
             raise ValueError("不支持的测试集格式")
         
+        # 加载时统一校验并转换，测试过程中不再逐条检查和查找字段
+        if not all(isinstance(test_case, dict) for test_case in testset):
+            raise ValueError("测试集中的每一项都必须是 JSON 对象")
+        testset = [TestCase.from_dict(test_case) for test_case in testset]
+        
         logger.info(f"加载了 {len(testset)} 条测试数据")
         return testset
     
@@ -96,100 +275,301 @@ class TestRunner:
                 top_k=top_k
             )
             
-            # 组装结果
-            result = {
-                'question': question,
-                'answer': rag_response.answer,
-                'contexts': [rag_response.contexts],
-                'ground_truth': ground_truth,
-                'ground_truth_contexts': ground_truth_contexts,
-                'search_type': search_type,
-                'response_time': rag_response.response_time,
-                'status': 'success'
-            }
-            
-            # 添加额外参数
-            result.update(kwargs)
+            return self._success_result(
+                question, ground_truth, ground_truth_contexts, search_type, rag_response, kwargs
+            )
             
-            return result
+        except Exception as e:
+            # 参数延迟格式化：日志级别高于 WARNING 时不拼接字符串
+            logger.warning("测试失败: %s... - %s", question[:50], e)
+            return self._failed_result(question, ground_truth, ground_truth_contexts, search_type, e)
+    
+    def run_batch_test(
+        self,
+        test_cases: List[TestCase],
+        search_type: str = "hybrid",
+        top_k: int = 5,
+        **kwargs
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        批量运行测试：同一检索配置下的多个问题通过一次批量请求完成
+        
+        Args:
+            test_cases: 测试用例列表
+            search_type: 检索类型
+            top_k: 返回文档数量
+            **kwargs: 其他参数（如 vector_weight, bm25_weight）
             
+        Returns:
+            List[Dict]: 测试结果（与 test_cases 顺序一致）；
+                服务端不支持批量接口（404）时返回 None，由调用方逐条执行
+        """
+        questions = [test_case.question for test_case in test_cases]
+        try:
+            rag_responses = self.spring_client.batch_rag_query(
+                questions=questions,
+                search_type=search_type,
+                top_k=top_k
+            )
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                if self._batch_supported:
+                    logger.warning("服务端不支持批量查询接口，改为逐条请求")
+                self._batch_supported = False
+                return None
+            error = e
         except Exception as e:
-            logger.error(f"测试失败: {question[:50]}... - {e}")
-            return {
-                'question': question,
-                'answer': '',
-                'contexts': [],
-                'ground_truth': ground_truth,
-                'ground_truth_contexts': ground_truth_contexts,
-                'search_type': search_type,
-                'response_time': 0,
-                'status': 'failed',
-                'error': str(e)
-            }
+            error = e
+        else:
+            return [
+                self._success_result(
+                    test_case.question,
+                    test_case.ground_truth,
+                    test_case.ground_truth_contexts,
+                    search_type,
+                    rag_response,
+                    kwargs
+                )
+                for test_case, rag_response in zip(test_cases, rag_responses)
+            ]
+        
+        logger.error(f"批量测试失败: {len(questions)} 个问题 - {error}")
+        return [
+            self._failed_result(
+                test_case.question,
+                test_case.ground_truth,
+                test_case.ground_truth_contexts,
+                search_type,
+                error
+            )
+            for test_case in test_cases
+        ]
+    
+    @staticmethod
+    def _success_result(
+        question: str,
+        ground_truth: str,
+        ground_truth_contexts: List[str],
+        search_type: str,
+        rag_response: RagResponse,
+        extra: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """组装成功的测试结果"""
+        result = {
+            'question': question,
+            'answer': rag_response.answer,
+            'contexts': list(rag_response.contexts),
+            'ground_truth': ground_truth,
+            'ground_truth_contexts': ground_truth_contexts,
+            'search_type': search_type,
+            'response_time': rag_response.response_time,
+            'status': 'success'
+        }
+        
+        # 批量请求的结果没有单条响应时间（NaN，不计入响应时间统计），另外记录整批耗时
+        if rag_response.batch_response_time is not None:
+            result['batch_response_time'] = rag_response.batch_response_time
+            result['batch_size'] = rag_response.batch_size
+        
+        # 添加额外参数
+        result.update(extra)
+        
+        return result
+    
+    @staticmethod
+    def _failed_result(
+        question: str,
+        ground_truth: str,
+        ground_truth_contexts: List[str],
+        search_type: str,
+        error: Exception
+    ) -> Dict[str, Any]:
+        """组装失败的测试结果"""
+        return {
+            'question': question,
+            'answer': '',
+            'contexts': [],
+            'ground_truth': ground_truth,
+            'ground_truth_contexts': ground_truth_contexts,
+            'search_type': search_type,
+            'response_time': 0,
+            'status': 'failed',
+            'error': str(error)
+        }
     
     def run_test_suite(
         self,
-        testset: List[Dict[str, Any]],
+        testset: List[Union[TestCase, Dict[str, Any]]],
         search_configs: List[Dict[str, Any]],
-        delay_between_requests: float = 0.5
+        delay_between_requests: float = 0.5,
+        concurrency: int = 8,
+        batch_size: int = 0,
+        raw_results_file: Optional[str] = None,
+        on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None
     ) -> List[Dict[str, Any]]:
         """
         运行测试套件
         
+        所有 (配置, 问题) 组合并发执行，同时进行的请求数不超过 concurrency；
+        batch_size > 0 时同一配置下每 batch_size 个问题合并为一次批量请求
+        
         Args:
-            testset: 测试集
+            testset: 测试集（TestCase 或测试集中的 JSON 对象）
             search_configs: 检索配置列表，例如:
                 [
                     {'name': 'vector', 'type': 'vector'},
                     {'name': 'bm25', 'type': 'bm25'},
                     {'name': 'hybrid_0.7_0.3', 'type': 'hybrid', 'vector_weight': 0.7, 'bm25_weight': 0.3}
                 ]
-            delay_between_requests: 请求之间的延迟（秒）
+            delay_between_requests: 请求间隔（秒），总请求速率限制为 1 / delay_between_requests 次/秒
+                （空闲时最多可突发 concurrency 个请求），0 表示不限速
+            concurrency: 最大并发测试数
+            batch_size: 批量请求的问题数，0 表示逐条请求；服务端不支持批量接口时自动退回逐条请求
+            raw_results_file: 原始结果文件路径（JSONL），每完成一个测试即追加一行；为空时不保存
+            on_result: 每完成一个测试时的回调，参数为 (结果在返回列表中的位置, 结果)
             
         Returns:
-            List[Dict]: 所有测试结果
+            List[Dict]: 所有测试结果（按配置、问题的原始顺序）
         """
-        all_results = []
+        testset = [
+            test_case if isinstance(test_case, TestCase) else TestCase.from_dict(test_case)
+            for test_case in testset
+        ]
         
         total_tests = len(testset) * len(search_configs)
         logger.info(f"开始测试: {len(testset)} 个问题 × {len(search_configs)} 种配置 = {total_tests} 次测试")
+        logger.info(f"测试配置: {[config.get('name', config['type']) for config in search_configs]}, 并发数: {concurrency}")
         
-        with tqdm(total=total_tests, desc="运行测试") as pbar:
-            for config in search_configs:
-                config_name = config.get('name', config['type'])
-                logger.info(f"\n测试配置: {config_name}")
-                
-                for test_case in testset:
-                    question = test_case.get('question', '')
-                    ground_truth = test_case.get('ground_truth', '')
-                    ground_truth_contexts = test_case.get('ground_truth_contexts', [])
-                    
-                    # 运行测试
-                    result = self.run_single_test(
-                        question=question,
-                        ground_truth=ground_truth,
-                        ground_truth_contexts=ground_truth_contexts,
-                        search_type=config['type'],
-                        top_k=config.get('top_k', 5),
-                        config_name=config_name,
-                        **{k: v for k, v in config.items() if k not in ['name', 'type', 'top_k']}
-                    )
-                    
-                    # 添加测试用例的元数据
-                    if 'metadata' in test_case:
-                        result['test_metadata'] = test_case['metadata']
-                    
-                    all_results.append(result)
-                    pbar.update(1)
-                    
-                    # 延迟避免请求过快
-                    if delay_between_requests > 0:
-                        time.sleep(delay_between_requests)
+        all_results = self._run_all(
+            testset, search_configs, delay_between_requests, concurrency, batch_size,
+            raw_results_file, on_result
+        )
         
         logger.info(f"\n测试完成: 成功 {sum(1 for r in all_results if r['status'] == 'success')} / {len(all_results)}")
         
         return all_results
     
+    def _run_all(
+        self,
+        testset: List[TestCase],
+        search_configs: List[Dict[str, Any]],
+        delay_between_requests: float,
+        concurrency: int,
+        batch_size: int = 0,
+        raw_results_file: Optional[str] = None,
+        on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        并发运行所有测试
+        
+        所有任务一次性提交到线程池，由线程数限制并发；线程数和 HTTP 连接池大小都与并发数一致。
+        结果按任务编号写回原位置，返回顺序与提交顺序一致；
+        指定 raw_results_file 时，结果按完成顺序逐行写入（中途中断时已完成的结果不会丢失）
+        
+        Returns:
+            List[Dict]: 所有测试结果（按配置、问题的原始顺序）
+        """
+        concurrency = max(1, concurrency)
+        
+        # 限速：平均每 delay 秒一个请求，但只在请求速率超过上限时才等待
+        rate_qps = 1 / delay_between_requests if delay_between_requests > 0 else float('inf')
+        bucket = TokenBucket(rate_qps, capacity=concurrency)
+        self.spring_client.set_pool_size(max(self.spring_client.pool_size, concurrency))
+        # 开始计时前建立好与并发数相同的连接，首批请求不再包含建立连接的耗时
+        self.spring_client.prewarm(concurrency)
+        
+        def run_one(test_kwargs: Dict[str, Any], test_case: TestCase) -> List[Dict[str, Any]]:
+            bucket.acquire()
+            
+            # 运行测试
+            result = self.run_single_test(
+                test_case.question,
+                test_case.ground_truth,
+                test_case.ground_truth_contexts,
+                **test_kwargs
+            )
+            
+            # 添加测试用例的元数据
+            if test_case.metadata is not None:
+                result['test_metadata'] = test_case.metadata
+            
+            return [result]
+        
+        def run_batch(test_kwargs: Dict[str, Any], test_cases: List[TestCase]) -> Optional[List[Dict[str, Any]]]:
+            if not self._batch_supported:
+                return None
+            
+            bucket.acquire()
+            results = self.run_batch_test(test_cases, **test_kwargs)
+            if results is None:
+                return None
+            
+            for test_case, result in zip(test_cases, results):
+                if test_case.metadata is not None:
+                    result['test_metadata'] = test_case.metadata
+            
+            return results
+        
+        # 每种配置的调用参数只计算一次，所有测试用例共用
+        config_kwargs = [
+            {
+                'search_type': config['type'],
+                'top_k': config.get('top_k', 5),
+                'config_name': config.get('name', config['type']),
+                **{k: v for k, v in config.items() if k not in ('name', 'type', 'top_k')}
+            }
+            for config in search_configs
+        ]
+        
+        # 任务：(配置调用参数, 测试用例列表)；逐条请求时每个任务只有一个测试用例
+        step = batch_size if batch_size > 0 else 1
+        jobs = [
+            (test_kwargs, testset[i:i + step])
+            for test_kwargs in config_kwargs
+            for i in range(0, len(testset), step)
+        ]
+        slots: List[List[Optional[Dict[str, Any]]]] = [[None] * len(test_cases) for _, test_cases in jobs]
+        # 每个任务的第一条结果在返回列表中的位置
+        starts = [0] * len(jobs)
+        for index in range(1, len(jobs)):
+            starts[index] = starts[index - 1] + len(jobs[index - 1][1])
+        
+        with ThreadPoolExecutor(max_workers=concurrency) as executor, \
+                tqdm(total=len(testset) * len(search_configs), desc="运行测试") as pbar, \
+                (open(raw_results_file, 'wb') if raw_results_file else nullcontext()) as raw_out:
+            # future -> (任务编号, 任务内起始位置)
+            pending = {}
+            for index, (test_kwargs, test_cases) in enumerate(jobs):
+                if batch_size > 0:
+                    future = executor.submit(run_batch, test_kwargs, test_cases)
+                else:
+                    future = executor.submit(run_one, test_kwargs, test_cases[0])
+                pending[future] = (index, 0)
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, offset = pending.pop(future)
+                    results = future.result()
+                    
+                    # 服务端不支持批量接口，该批测试改为逐条提交
+                    if results is None:
+                        test_kwargs, test_cases = jobs[index]
+                        for position, test_case in enumerate(test_cases):
+                            pending[executor.submit(run_one, test_kwargs, test_case)] = (index, position)
+                        continue
+                    
+                    slots[index][offset:offset + len(results)] = results
+                    pbar.set_postfix_str(jobs[index][0]['config_name'], refresh=False)
+                    if raw_out is not None:
+                        raw_out.writelines(_json_line(result) for result in results)
+                    if on_result is not None:
+                        for position, result in enumerate(results, starts[index] + offset):
+                            on_result(position, result)
+                    pbar.update(len(results))
+        
+        return [result for results in slots for result in results]
+    
     def evaluate_results(
         self,
         test_results: List[Dict[str, Any]]
@@ -222,7 +602,10 @@ class TestRunner:
         testset_path: str,
         search_configs: List[Dict[str, Any]],
         output_dir: str = "results",
-        save_raw_results: bool = True
+        save_raw_results: bool = True,
+        concurrency: int = 8,
+        batch_size: int = 0,
+        eval_window: int = 0
     ) -> Dict[str, Any]:
         """
         运行完整测试流程
@@ -232,6 +615,10 @@ class TestRunner:
             search_configs: 检索配置列表
             output_dir: 输出目录
             save_raw_results: 是否保存原始结果
+            concurrency: 最大并发测试数
+            batch_size: 批量请求的问题数，0 表示逐条请求
+            eval_window: 大于 0 时边测试边评估，每凑满 eval_window 条成功结果评估一次；
+                0 表示全部测试完成后统一评估（重复的检索结果只评估一次）
             
         Returns:
             Dict: 测试报告
@@ -243,18 +630,26 @@ class TestRunner:
         # 1. 加载测试集
         testset = self.load_testset(testset_path)
         
-        # 2. 运行测试
-        test_results = self.run_test_suite(testset, search_configs)
-        
-        # 保存原始结果
-        if save_raw_results:
-            raw_results_file = output_path / "raw_test_results.json"
-            with open(raw_results_file, 'w', encoding='utf-8') as f:
-                json.dump(test_results, f, ensure_ascii=False, indent=2)
+        # 2. 运行测试（原始结果在测试过程中逐条写入 JSONL）
+        # 开启 eval_window 时评估在后台线程中与测试同时进行
+        raw_results_file = output_path / "raw_test_results.jsonl" if save_raw_results else None
+        streaming_evaluator = (
+            _StreamingEvaluator(self.ragas_evaluator, eval_window) if eval_window > 0 else None
+        )
+        test_results = self.run_test_suite(
+            testset, search_configs, concurrency=concurrency, batch_size=batch_size,
+            raw_results_file=str(raw_results_file) if raw_results_file else None,
+            on_result=streaming_evaluator.put if streaming_evaluator else None
+        )
+        if raw_results_file:
             logger.info(f"原始结果已保存: {raw_results_file}")
         
         # 3. 评估结果
-        df_evaluated = self.evaluate_results(test_results)
+        if streaming_evaluator is not None:
+            logger.info("等待剩余测试结果评估完成...")
+            df_evaluated = streaming_evaluator.finish()
+        else:
+            df_evaluated = self.evaluate_results(test_results)
         
         # 保存评估结果
         csv_file = output_path / "evaluation_results.csv"
@@ -262,7 +657,8 @@ class TestRunner:
         logger.info(f"评估结果已保存: {csv_file}")
         
         json_file = output_path / "evaluation_results.json"
-        df_evaluated.to_json(json_file, orient='records', force_ascii=False, indent=2)
+        # 不缩进：该文件由程序读取（报告生成时原样拷贝进 report_data.js），缩进只会增大文件和写入耗时
+        df_evaluated.to_json(json_file, orient='records', force_ascii=False)
         logger.info(f"评估结果已保存: {json_file}")
         
         # 4. 生成汇总统计
@@ -272,24 +668,19 @@ class TestRunner:
         comparison = self.ragas_evaluator.compare_search_types(df_evaluated)
         
         # 保存对比结果
+        # 多级列 (指标, 统计量) 展平为单行表头 "指标_统计量"，读取时无需解析两行表头
         comparison_file = output_path / "search_type_comparison.csv"
-        comparison.to_csv(comparison_file, encoding='utf-8-sig')
+        comparison_flat = comparison.set_axis(
+            [f"{metric}_{stat}" for metric, stat in comparison.columns], axis=1
+        )
+        comparison_flat.to_csv(comparison_file, encoding='utf-8-sig')
         logger.info(f"对比结果已保存: {comparison_file}")
         
         # 6. 组装报告
         # 将 comparison DataFrame 转换为 JSON 可序列化的格式
+        # 复用已展平的列名（例如 "context_precision_mean"），一次性转换为 {检索方式: {列名: 值}}
         if not comparison.empty:
-            # 重置索引，将多级列转换为字符串
-            comparison_dict = {}
-            for search_type in comparison.index:
-                comparison_dict[search_type] = {}
-                for col in comparison.columns:
-                    # col 是 tuple，如 ('context_precision', 'mean')
-                    if isinstance(col, tuple):
-                        metric_name = f"{col[0]}_{col[1]}"  # 例如: "context_precision_mean"
-                    else:
-                        metric_name = str(col)
-                    comparison_dict[search_type][metric_name] = float(comparison.loc[search_type, col])
+            comparison_dict = comparison_flat.astype(float).to_dict(orient='index')
         else:
             comparison_dict = {}
         
@@ -304,7 +695,7 @@ class TestRunner:
             'summary_statistics': summary_stats,
             'search_type_comparison': comparison_dict,
             'output_files': {
-                'raw_results': str(output_path / "raw_test_results.json") if save_raw_results else None,
+                'raw_results': str(raw_results_file) if raw_results_file else None,
                 'evaluation_csv': str(csv_file),
                 'evaluation_json': str(json_file),
                 'comparison': str(comparison_file)
@@ -313,8 +704,17 @@ class TestRunner:
         
         # 保存报告
         report_file = output_path / "test_report.json"
-        with open(report_file, 'w', encoding='utf-8') as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            # 统计值中可能包含 numpy 标量，由 orjson 直接序列化；
+            # 与 json.dump 一致，允许非字符串的字典键（转换为字符串）
+            with open(report_file, 'wb') as f:
+                f.write(orjson.dumps(
+                    report,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                ))
+        else:
+            with open(report_file, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
         logger.info(f"测试报告已保存: {report_file}")
         
         return report
@@ -0,0 +1,9 @@
+"""
+测试公共配置：src 下的模块以顶层模块互相导入（如 from spring_ai_client import ...），
+测试时同样将 src 加入导入路径
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,143 @@
+"""
+RagasEvaluator 评估结果缓存的测试
+
+不调用 Ragas 和 LLM：用内存数据集代替 datasets.Dataset，
+用按 Ragas 输出格式构造结果的函数代替 _run_evaluate
+"""
+
+import sys
+from types import ModuleType, SimpleNamespace
+
+import pandas as pd
+
+from ragas_evaluator import RagasEvaluator, _INPUT_COLUMNS, _RESULT_INPUT_COLUMNS
+
+_METRICS = [SimpleNamespace(name='faithfulness'), SimpleNamespace(name='answer_relevancy')]
+
+
+class _FakeDataset:
+    """datasets.Dataset 的替身：只实现评估流程用到的 from_pandas / to_pandas / select"""
+
+    def __init__(self, df: pd.DataFrame):
+        self._df = df.reset_index(drop=True)
+
+    @classmethod
+    def from_pandas(cls, df: pd.DataFrame, preserve_index: bool = True) -> "_FakeDataset":
+        return cls(df)
+
+    def to_pandas(self) -> pd.DataFrame:
+        return self._df.copy()
+
+    def select(self, indices) -> "_FakeDataset":
+        return _FakeDataset(self._df.iloc[list(indices)])
+
+
+class _DictCache(dict):
+    """diskcache.Cache 的 get/set 接口"""
+
+    def get(self, key, default=None):
+        return super().get(key, default)
+
+    def set(self, key, value):
+        self[key] = value
+
+
+def _fake_run_evaluate(dataset, metrics):
+    """按 Ragas EvaluationResult.to_pandas() 的格式返回结果：输入列使用 Ragas 的列名"""
+    df = dataset.to_pandas().rename(columns=_RESULT_INPUT_COLUMNS)
+    for i, metric in enumerate(metrics):
+        df[metric.name] = 0.5 + 0.1 * i
+    return df
+
+
+def _make_evaluator(cache) -> RagasEvaluator:
+    # 跳过 __init__，避免导入 ragas / langchain 并创建模型客户端
+    evaluator = RagasEvaluator.__new__(RagasEvaluator)
+    evaluator.llm_model = 'qwen-turbo'
+    evaluator.embedding_model = 'text-embedding-v3'
+    evaluator.metrics = _METRICS
+    evaluator.cache = cache
+    evaluator._run_evaluate = _fake_run_evaluate
+    return evaluator
+
+
+def _make_dataset() -> _FakeDataset:
+    return _FakeDataset(pd.DataFrame({
+        'question': ['q1', 'q2', 'q3'],
+        'answer': ['a1', 'a2', 'a3'],
+        'contexts': [['c1'], ['c2', 'c3'], []],
+        'ground_truth': ['g1', 'g2', 'g3'],
+    }, columns=_INPUT_COLUMNS))
+
+
+def test_cache_path_matches_ragas_output_columns():
+    expected = _make_evaluator(cache=None)._evaluate_dataset(_make_dataset())
+
+    evaluator = _make_evaluator(cache=_DictCache())
+    # 第一次：全部未命中，调用（模拟的）Ragas 并写入缓存
+    first = evaluator._evaluate_dataset(_make_dataset())
+    # 第二次：全部命中缓存，不调用 Ragas
+    evaluator._run_evaluate = None
+    cached = evaluator._evaluate_dataset(_make_dataset())
+
+    assert list(first.columns) == list(expected.columns)
+    assert list(cached.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(cached, expected, check_dtype=False)
+
+
+_CONTEXT_METRICS = [SimpleNamespace(name='context_precision'), SimpleNamespace(name='context_recall')]
+_ANSWER_METRICS = [SimpleNamespace(name='faithfulness')]
+
+
+def _context_score(row) -> float:
+    """检索质量得分只由 (question, contexts, ground_truth) 决定，且不同组合的得分不同"""
+    return int(row['question'][1:]) + 0.1 * len(row['contexts'])
+
+
+def test_deduplicated_context_metrics_land_on_matching_rows(monkeypatch):
+    fake_datasets = ModuleType('datasets')
+    fake_datasets.Dataset = _FakeDataset
+    monkeypatch.setitem(sys.modules, 'datasets', fake_datasets)
+
+    calls = []
+
+    def run_evaluate(dataset, metrics):
+        df = dataset.to_pandas()
+        names = [metric.name for metric in metrics]
+        calls.append((names, list(zip(df['question'], df['contexts'].map(tuple)))))
+        result = df.rename(columns=_RESULT_INPUT_COLUMNS)
+        if 'context_precision' in names:
+            result['context_precision'] = df.apply(_context_score, axis=1)
+            result['context_recall'] = df.apply(_context_score, axis=1) + 0.5
+        if 'faithfulness' in names:
+            result['faithfulness'] = df['answer'].map(lambda answer: float(answer.split(':')[1][1:]))
+        return result
+
+    evaluator = _make_evaluator(cache=None)
+    evaluator.context_metrics = _CONTEXT_METRICS
+    evaluator.answer_metrics = _ANSWER_METRICS
+    evaluator.metrics = _CONTEXT_METRICS + _ANSWER_METRICS
+    evaluator._run_evaluate = run_evaluate
+
+    # 两种检索配置回答同一批问题：q0、q1 检索到的上下文相同，q2 不同
+    df_eval = pd.DataFrame({
+        'question': ['q0', 'q1', 'q2', 'q0', 'q1', 'q2'],
+        'answer': ['vector:a0', 'vector:a1', 'vector:a2', 'bm25:a0', 'bm25:a1', 'bm25:a2'],
+        'contexts': [['c0'], ['c1'], ['c2'], ['c0'], ['c1'], ['c2', 'x']],
+        'ground_truth': ['g0', 'g1', 'g2', 'g0', 'g1', 'g2'],
+    }, columns=_INPUT_COLUMNS)
+
+    result = evaluator._evaluate_deduplicated(df_eval)
+
+    # 检索质量指标每个唯一的 (question, contexts, ground_truth) 只评估一次，答案指标逐行评估
+    context_calls = [rows for names, rows in calls if 'context_precision' in names]
+    answer_calls = [rows for names, rows in calls if 'faithfulness' in names]
+    assert context_calls == [[('q0', ('c0',)), ('q1', ('c1',)), ('q2', ('c2',)), ('q2', ('c2', 'x'))]]
+    assert len(answer_calls) == 1 and len(answer_calls[0]) == len(df_eval)
+
+    # 每一行的得分都来自它自己的输入
+    assert list(result['user_input']) == list(df_eval['question'])
+    assert list(result['context_precision']) == list(df_eval.apply(_context_score, axis=1))
+    assert list(result['context_recall']) == list(df_eval.apply(_context_score, axis=1) + 0.5)
+    assert list(result['faithfulness']) == [0.0, 1.0, 2.0, 0.0, 1.0, 2.0]
+    assert list(result.columns[-3:]) == ['context_precision', 'context_recall', 'faithfulness']
@@ -0,0 +1,205 @@
+"""
+TestRunner 并发执行、TokenBucket 限速和边测试边评估的测试
+
+不访问 Spring AI 服务和 Ragas：用内存中的假客户端和假评估器代替
+"""
+
+import random
+import threading
+import time
+
+import pandas as pd
+import pytest
+import requests
+
+# 以模块方式导入：test_runner 中的 TestCase / TestRunner 若被导入测试模块命名空间，会被 pytest 当作测试类收集
+import test_runner
+from spring_ai_client import RagResponse
+
+
+class _FakeSpringClient:
+    """SpringAIClient 的假实现：随机延迟返回，使结果乱序完成"""
+
+    def __init__(self, batch_supported: bool = True):
+        self.batch_supported = batch_supported
+        self.pool_size = 1
+        self.single_calls = []
+        self.batch_calls = []
+        self._lock = threading.Lock()
+
+    def set_pool_size(self, pool_size):
+        self.pool_size = pool_size
+
+    def prewarm(self, connections=1):
+        pass
+
+    def rag_query(self, question, search_type="hybrid", top_k=5):
+        with self._lock:
+            self.single_calls.append((search_type, question))
+        time.sleep(random.uniform(0, 0.01))
+        return RagResponse(question, f"{search_type}:{question}", ['c'], 0.1, search_type)
+
+    def batch_rag_query(self, questions, search_type="hybrid", top_k=5):
+        with self._lock:
+            self.batch_calls.append((search_type, list(questions)))
+        if not self.batch_supported:
+            response = requests.Response()
+            response.status_code = 404
+            raise requests.exceptions.HTTPError("404 Not Found", response=response)
+        time.sleep(random.uniform(0, 0.01))
+        return [
+            RagResponse(question, f"{search_type}:{question}", ['c'], float('nan'), search_type, 0.2, len(questions))
+            for question in questions
+        ]
+
+
+class _FakeEvaluator:
+    """RagasEvaluator 的假实现：每条结果的得分为其问题编号"""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.calls = []
+
+    def evaluate_with_metadata(self, results):
+        self.calls.append([r['question'] for r in results])
+        if self.fail_on is not None and self.fail_on in self.calls[-1]:
+            raise RuntimeError("evaluation failed")
+        return pd.DataFrame({
+            'question': [r['question'] for r in results],
+            'faithfulness': [float(r['question']) for r in results],
+        })
+
+
+def _make_runner(client: _FakeSpringClient) -> test_runner.TestRunner:
+    # 跳过 __init__，避免创建真实的 HTTP 客户端和 Ragas 评估器
+    runner = test_runner.TestRunner.__new__(test_runner.TestRunner)
+    runner.spring_client = client
+    runner.ragas_evaluator = _FakeEvaluator()
+    runner._batch_supported = True
+    return runner
+
+
+_TESTSET = [{'question': str(i), 'metadata': {'i': i}} for i in range(7)]
+_CONFIGS = [{'name': 'v', 'type': 'vector'}, {'name': 'b', 'type': 'bm25'}]
+_EXPECTED = [(config['type'], str(i)) for config in _CONFIGS for i in range(7)]
+
+
+def _run(runner, batch_size):
+    positions = {}
+    results = runner.run_test_suite(
+        _TESTSET, _CONFIGS, delay_between_requests=0, concurrency=4, batch_size=batch_size,
+        on_result=lambda position, result: positions.setdefault(position, result)
+    )
+    return results, positions
+
+
+def _assert_in_order(results, positions):
+    assert [(r['search_type'], r['question']) for r in results] == _EXPECTED
+    assert all(r['status'] == 'success' for r in results)
+    assert [r['answer'] for r in results] == [f"{t}:{q}" for t, q in _EXPECTED]
+    assert [r['test_metadata']['i'] for r in results] == [int(q) for _, q in _EXPECTED]
+    # on_result 的位置与结果在返回列表中的位置一致
+    assert sorted(positions) == list(range(len(results)))
+    assert all(positions[i] is results[i] for i in positions)
+
+
+@pytest.mark.parametrize('batch_size', [0, 3])
+def test_results_keep_submission_order(batch_size):
+    client = _FakeSpringClient()
+    results, positions = _run(_make_runner(client), batch_size)
+
+    _assert_in_order(results, positions)
+    if batch_size > 0:
+        assert not client.single_calls
+        # 7 个问题按 3 个一批：每种配置 3 次批量请求
+        assert sorted(len(questions) for _, questions in client.batch_calls) == [1, 1, 3, 3, 3, 3]
+        assert all(r['batch_size'] in (1, 3) for r in results)
+    else:
+        assert not client.batch_calls
+        assert sorted(client.single_calls) == sorted(_EXPECTED)
+
+
+def test_batch_404_falls_back_to_single_requests():
+    client = _FakeSpringClient(batch_supported=False)
+    runner = _make_runner(client)
+    results, positions = _run(runner, batch_size=3)
+
+    _assert_in_order(results, positions)
+    assert runner._batch_supported is False
+    # 收到 404 后不再发起新的批量请求，每个问题在每种配置下恰好逐条请求一次
+    assert len(client.batch_calls) <= 6
+    assert sorted(client.single_calls) == sorted(_EXPECTED)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_token_bucket_waits_only_beyond_capacity(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(test_runner.time, 'monotonic', clock.monotonic)
+    bucket = test_runner.TokenBucket(rate_qps=2, capacity=2)
+
+    # 容量内的突发请求无需等待，之后每个令牌需要 1 / rate_qps 秒
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+
+    # 1 秒补充 2 个令牌，只抵消已预约的欠额
+    clock.now = 1.0
+    assert bucket.reserve() == 0.5
+
+    # 长时间空闲后令牌最多积累到容量
+    clock.now = 100.0
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.5]
+
+
+def test_token_bucket_acquire_sleeps_for_reserved_delay(monkeypatch):
+    clock = _Clock()
+    sleeps = []
+    monkeypatch.setattr(test_runner.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(test_runner.time, 'sleep', sleeps.append)
+    bucket = test_runner.TokenBucket(rate_qps=4, capacity=1)
+
+    for _ in range(3):
+        bucket.acquire()
+
+    assert sleeps == [0.25, 0.5]
+
+
+def test_token_bucket_unlimited():
+    bucket = test_runner.TokenBucket(float('inf'))
+    assert all(bucket.reserve() == 0.0 for _ in range(10))
+
+
+def _result(i, status='success'):
+    return {'question': str(i), 'status': status}
+
+
+def test_streaming_evaluator_restores_order():
+    evaluator = _FakeEvaluator()
+    streaming = test_runner._StreamingEvaluator(evaluator, window=2, max_wait=0.05)
+
+    for i in [5, 1, 4, 0, 3, 2, 6]:
+        streaming.put(i, _result(i, 'failed' if i == 3 else 'success'))
+    df = streaming.finish()
+
+    # 失败的结果不参与评估，其余按提交时的位置排序
+    assert list(df['question']) == ['0', '1', '2', '4', '5', '6']
+    assert list(df['faithfulness']) == [0.0, 1.0, 2.0, 4.0, 5.0, 6.0]
+    assert all(len(call) <= 2 for call in evaluator.calls)
+
+
+def test_streaming_evaluator_raises_evaluation_error():
+    evaluator = _FakeEvaluator(fail_on='1')
+    streaming = test_runner._StreamingEvaluator(evaluator, window=2, max_wait=0.05)
+
+    for i in range(6):
+        streaming.put(i, _result(i))
+
+    with pytest.raises(RuntimeError, match="evaluation failed"):
+        streaming.finish()
+    # 出错后不再评估后续结果
+    assert evaluator.calls == [['0', '1']]